@@ -1,23 +1,17 @@
-import requests
-import pandas as pd
 from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
 import os
-import pytz
 import logging
-from google.oauth2 import service_account
-import gspread
-from gspread_dataframe import set_with_dataframe
+from odoo_client import get_client, OdooRPCError
+from ingest import fetch_frame, apply_schema, export_view, AGEING_SCHEMA
+from sheets import get_sheets, paste_frame
+from outputs import save_frame
+from snapshots import append_snapshot
 
 # === Load .env ===
 load_dotenv()
 
 # ========= CONFIG ==========
-ODOO_URL = os.getenv("ODOO_URL")
-DB = os.getenv("ODOO_DB")
-USERNAME = os.getenv("ODOO_USERNAME")
-PASSWORD = os.getenv("ODOO_PASSWORD")
-
 COMPANIES = {
     
     3: "Metal Trims",
@@ -38,75 +32,27 @@ os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger()
 
-# === Session ===
-session = requests.Session()
-USER_ID = None
-
-# ========= LOGIN ==========
-def login():
-    global USER_ID
-    payload = {
-        "jsonrpc": "2.0",
-        "params": {"db": DB, "login": USERNAME, "password": PASSWORD}
-    }
-    r = session.post(f"{ODOO_URL}/web/session/authenticate", json=payload)
-    r.raise_for_status()
-    result = r.json().get("result")
-    if result and "uid" in result:
-        USER_ID = result["uid"]
-        log.info(f"✅ Logged in (uid={USER_ID})")
-        return result
-    raise Exception("❌ Login failed")
-
-# ========= SWITCH COMPANY ==========
-def switch_company(company_id):
-    if USER_ID is None:
-        raise Exception("User not logged in yet")
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "res.users",
-            "method": "write",
-            "args": [[USER_ID], {"company_id": company_id}],
-            "kwargs": {"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
-        },
-    }
-    r = session.post(f"{ODOO_URL}/web/dataset/call_kw", json=payload)
-    r.raise_for_status()
-    if "error" in r.json():
-        log.error(f"❌ Failed to switch company {company_id}: {r.json()['error']}")
-        return False
-    log.info(f"🔄 Switched to company {company_id}")
-    return True
+# === Odoo client ===
+client = get_client()
 
 # ========= CREATE FORECAST WIZARD ==========
 def create_ageing_wizard(company_id):
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "stock.ageing",
-            "method": "create",
-            "args": [{
+    try:
+        result = client.call_kw(
+            "stock.ageing", "create",
+            args=[{
                 "report_type": "ageing",
                 "report_for": "rm",
                 "all_iteam_list": [],
                 "from_date": False,
                 "to_date": TO_DATE
             }],
-            "kwargs": {"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
-        },
-    }
-    r = session.post(f"{ODOO_URL}/web/dataset/call_kw", json=payload)
-    r.raise_for_status()
-
-    data = r.json()
-    if "error" in data:
-        log.error(f"❌ Ageing wizard creation failed: {data['error']}")
-        raise Exception(data["error"])
+            kwargs={"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
+        )
+    except OdooRPCError as e:
+        log.error(f"❌ Ageing wizard creation failed: {e.error}")
+        raise
 
-    result = data.get("result")
     if isinstance(result, list) and len(result) > 0 and "id" in result[0]:
         wiz_id = result[0]["id"]
     else:
@@ -119,28 +65,13 @@ def create_ageing_wizard(company_id):
 
 # ========= COMPUTE FORECAST ==========
 def compute_ageing(company_id, wizard_id):
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "stock.ageing",
-            "method": "action_print_ageing_report",
-            "args": [[wizard_id]],
-            "kwargs": {
-                "context": {
-                    "lang": "en_US",
-                    "tz": "Asia/Dhaka",
-                    "uid": USER_ID,
-                    "allowed_company_ids": [company_id],
-                    "company_id": company_id,
-                }
-            },
-        },
-    }
-    r = session.post(f"{ODOO_URL}/web/dataset/call_button", json=payload)
-    r.raise_for_status()
+    result = client.call_button(
+        "stock.ageing", "action_print_ageing_report",
+        args=[[wizard_id]],
+        kwargs={"context": client.context(company_id)},
+    )
     log.info(f"⚡ Ageing report computed for wizard {wizard_id} (company {company_id})")
-    return r.json()
+    return result
 
 
 # ========= FETCH OPENING/CLOSING WITH LABELS ==========
@@ -185,46 +116,20 @@ def fetch_ageing(company_id, cname):
         "rejected": {}, "company_id": {"fields": {"display_name": {}}},
     }
 
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "stock.ageing",
-            "method": "web_search_read",
-            "args": [],
-            "kwargs": {
-                "specification": specification,
-                "offset": 0,
-                "limit": 5000,
-                "context": context,
-                "count_limit": 10000,
-                "domain": [["product_id.categ_id.complete_name", "ilike", "All / RM"]],
-            },
-        },
-    }
-
-    r = session.post(f"{ODOO_URL}/web/dataset/call_kw", json=payload)
-    r.raise_for_status()
-
-    records = r.json()["result"]["records"]
-
-    # Flatten nested display_name fields
-    def flatten(record):
-        flat = {}
-        for k, v in record.items():
-            if isinstance(v, dict) and "display_name" in v:
-                flat[k] = v["display_name"]
-            else:
-                flat[k] = v
-        return flat
-
-    flat_records = [flatten(rec) for rec in records]
+    # Page through the report straight into column buffers (nested dicts → display_name)
+    df = fetch_frame(
+        client,
+        "stock.ageing",
+        specification,
+        domain=[["product_id.categ_id.complete_name", "ilike", "All / RM"]],
+        context=context,
+    )
 
-    # Convert to DataFrame and rename columns
-    df = pd.DataFrame(flat_records)
+    # Rename columns
     df.rename(columns=FIELD_LABELS, inplace=True)
     if "id" in df.columns:
         df.drop(columns=["id"], inplace=True)
+    apply_schema(df, AGEING_SCHEMA)
 
     log.info(f"📊 {cname}: {len(df)} rows fetched (ageing report)")
     return df
@@ -240,17 +145,12 @@ def paste_to_google_sheet(df, sheet_key, worksheet_name):
         log.warning("DataFrame empty. Skipping Google Sheet update.")
         return
 
-    scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    creds = service_account.Credentials.from_service_account_file("service_account.json", scopes=scope)
-    client = gspread.authorize(creds)
-    sheet = client.open_by_key(sheet_key)
-    worksheet = sheet.worksheet(worksheet_name)
+    worksheet = get_sheets().worksheet(sheet_key, worksheet_name)
 
-    # Clear only columns A → T (20 columns)
-    worksheet.batch_clear(["A:T"])
+    import pytz
 
-    # Paste data
-    set_with_dataframe(worksheet, df)
+    # Paste data over columns A → T only
+    paste_frame(worksheet, export_view(df), clear_range="A:T")
 
     tz = pytz.timezone("Asia/Dhaka")
     timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
@@ -263,20 +163,26 @@ def paste_to_google_sheet(df, sheet_key, worksheet_name):
     log.info(f"✅ Data pasted to {worksheet_name} & timestamp updated: {timestamp}")
 
 
+# ========= PROCESS COMPANY ==========
+def process_company(cid, cname):
+    # The compute rewrites stock.ageing for every company: compute and fetch one company at a time
+    with client.result_lock("stock.ageing"):
+        df = fetch_ageing(cid, cname)
+
+    if not df.empty:
+        # Save locally
+        local_file = os.path.join(DOWNLOAD_DIR, f"{cname.lower().replace(' ', '')}_ageing_{TO_DATE}.xlsx")
+        for path in save_frame(df, local_file):
+            log.info(f"📂 Saved locally: {path}")
+        append_snapshot(df, "mt_zip_ageing", cname, TO_DATE)
+
+        # Google Sheet paste
+        sheet_key = "1j37Y6g3pnMWtwe2fjTe1JTT32aRLS0Z1YPjl3v657Cc"
+        worksheet_name = "Closing Stock" if cid == 1 else "Closing Stock - MT"
+        paste_to_google_sheet(df, sheet_key=sheet_key, worksheet_name=worksheet_name)
+
+
 # ========= MAIN SYNC ==========
 if __name__ == "__main__":
-    login()
-    for cid, cname in COMPANIES.items():
-        if switch_company(cid):
-            df = fetch_ageing(cid, cname)
-
-            if not df.empty:
-                # Save locally
-                local_file = os.path.join(DOWNLOAD_DIR, f"{cname.lower().replace(' ', '')}_ageing_{TO_DATE}.xlsx")
-                df.to_excel(local_file, index=False)
-                log.info(f"📂 Saved locally: {local_file}")
-
-                # Google Sheet paste
-                sheet_key = "1j37Y6g3pnMWtwe2fjTe1JTT32aRLS0Z1YPjl3v657Cc"
-                worksheet_name = "Closing Stock" if cid == 1 else "Closing Stock - MT"
-                paste_to_google_sheet(df, sheet_key=sheet_key, worksheet_name=worksheet_name)
+    client.login()
+    client.for_each_company(COMPANIES, process_company)
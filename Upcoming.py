@@ -1,15 +1,12 @@
-import requests
-import time
 import logging
 import sys
 import os
+import threading
 from datetime import datetime
-import gspread
-from google.oauth2 import service_account
-import pandas as pd
-import pytz
 from dotenv import load_dotenv
-from requests.exceptions import RequestException
+from odoo_client import get_client, OdooRPCError
+from sheets import get_sheets, paste_rows
+from snapshots import append_snapshot, table_frame
 
 load_dotenv()
 logging.basicConfig(
@@ -20,11 +17,6 @@ logging.basicConfig(
 log = logging.getLogger()
 
 # ========= CONFIG ==========
-ODOO_URL = os.getenv("ODOO_URL")
-DB       = os.getenv("ODOO_DB")
-USERNAME = os.getenv("ODOO_USERNAME")
-PASSWORD = os.getenv("ODOO_PASSWORD")
-
 # company_id as string (matches response field)
 COMPANIES = {
     "1": "Zipper",
@@ -38,102 +30,65 @@ WORKSHEET_MAP = {
     "3": "Mt_Upcoming",
 }
 
-session = requests.Session()
-USER_ID = None
+# Filter by company/bucket and sum current_value per (item_category, period) on the server
+READ_GROUP = os.getenv("UPCOMING_READ_GROUP", "1") == "1"
 
-# ========= RETRY WRAPPER ==========
-def retry_request(method, url, max_retries=3, backoff=3, **kwargs):
-    for attempt in range(1, max_retries + 1):
-        try:
-            r = method(url, **kwargs)
-            r.raise_for_status()
-            return r
-        except RequestException as e:
-            log.warning(f"⚠️  Attempt {attempt} failed: {e}")
-            if attempt < max_retries:
-                log.info(f"⏳ Retrying in {backoff}s...")
-                time.sleep(backoff)
-            else:
-                log.error("❌ All retry attempts failed.")
-                raise
-
-# ========= LOGIN ==========
-def login():
-    global USER_ID
-    payload = {
-        "jsonrpc": "2.0",
-        "params": {"db": DB, "login": USERNAME, "password": PASSWORD},
-    }
-    r = retry_request(session.post, f"{ODOO_URL}/web/session/authenticate", json=payload)
-    result = r.json().get("result")
-    if result and "uid" in result:
-        USER_ID = result["uid"]
-        log.info(f"✅ Logged in (uid={USER_ID})")
-        return result
-    raise Exception("❌ Login failed")
-
-# ========= SWITCH COMPANY ==========
-def switch_company(company_id_int):
-    if USER_ID is None:
-        raise Exception("User not logged in yet")
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "res.users",
-            "method": "write",
-            "args": [[USER_ID], {"company_id": company_id_int}],
-            "kwargs": {
-                "context": {
-                    "allowed_company_ids": [company_id_int],
-                    "company_id": company_id_int,
-                }
-            },
-        },
-    }
-    r = retry_request(session.post, f"{ODOO_URL}/web/dataset/call_kw", json=payload)
-    if "error" in r.json():
-        log.error(f"❌ Failed to switch company {company_id_int}: {r.json()['error']}")
-        return False
-    log.info(f"🔄 Session switched to company {company_id_int}")
-    return True
+client = get_client()
 
 # ========= FETCH RAW UPCOMING DATA ==========
 def fetch_upcoming_data():
     """Fetches all rm.ageing.raw.data rows (all companies, upcoming + 180_plus buckets)."""
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "rm.ageing.raw.data",
-            "method": "search_read",
-            "args": [],
-            "kwargs": {
-                "order": "period asc, item_category asc",
-                "domain": [],
-                "fields": [
-                    "company_id", "item_category", "classification",
-                    "product_id", "lot_id", "bucket", "period",
-                    "closing_value", "current_value", "utilization",
-                ],
-                "context": {
-                    "lang": "en_US",
-                    "tz": "Asia/Dhaka",
-                    "uid": USER_ID,
-                    "allowed_company_ids": [int(k) for k in COMPANIES],
-                },
+    result = client.call_kw(
+        "rm.ageing.raw.data", "search_read",
+        kwargs={
+            "order": "period asc, item_category asc",
+            "domain": [],
+            "fields": [
+                "company_id", "item_category", "classification",
+                "product_id", "lot_id", "bucket", "period",
+                "closing_value", "current_value", "utilization",
+            ],
+            "context": {
+                "lang": "en_US",
+                "tz": "Asia/Dhaka",
+                "uid": client.uid,
+                "allowed_company_ids": [int(k) for k in COMPANIES],
             },
         },
-    }
-    r = retry_request(
-        session.post,
-        f"{ODOO_URL}/web/dataset/call_kw/rm.ageing.raw.data/search_read",
-        json=payload,
-    )
-    result = r.json().get("result", [])
+    ) or []
     log.info(f"📊 Fetched {len(result)} raw rows (all companies)")
     return result
 
+_raw_rows = None
+_raw_lock = threading.Lock()
+
+def get_raw_rows():
+    """Raw rows fetched once per run, shared by every company."""
+    global _raw_rows
+    with _raw_lock:
+        if _raw_rows is None:
+            _raw_rows = fetch_upcoming_data()
+    return _raw_rows
+
+# ========= FETCH GROUPED UPCOMING DATA ==========
+def fetch_upcoming_groups(company_id_str, cname):
+    """Sum of current_value per (item_category, period) over the company's upcoming buckets."""
+    groups = client.call_kw(
+        "rm.ageing.raw.data", "read_group",
+        kwargs={
+            "domain": [
+                ("company_id", "=", company_id_str),
+                ("bucket", "=like", "upcoming%"),
+            ],
+            "fields": ["current_value:sum"],
+            "groupby": ["item_category", "period"],
+            "lazy": False,
+            "context": client.context(int(company_id_str)),
+        },
+    ) or []
+    log.info(f"📊 {cname}: fetched {len(groups)} (category, period) groups")
+    return groups
+
 # ========= TRANSFORM TO WIDE FORMAT ==========
 def transform_to_wide(raw_rows, company_id_str, cname):
     """
@@ -149,6 +104,8 @@ def transform_to_wide(raw_rows, company_id_str, cname):
         log.warning(f"No raw data to process for {cname}")
         return [], [], []
 
+    import pandas as pd
+
     df = pd.DataFrame(raw_rows)
     df = df[df["company_id"].astype(str) == company_id_str].copy()
 
@@ -163,6 +120,26 @@ def transform_to_wide(raw_rows, company_id_str, cname):
         log.warning(f"No upcoming rows for {cname}")
         return [], [], []
 
+    return build_wide(df_up, cname)
+
+def transform_groups_to_wide(groups, cname):
+    """Same wide table as transform_to_wide, built from read_group sums."""
+    if not groups:
+        log.warning(f"No upcoming groups for {cname}")
+        return [], [], []
+
+    import pandas as pd
+
+    df_up = pd.DataFrame(
+        [(g["item_category"] or None, g["period"] or None, g["current_value"]) for g in groups],
+        columns=["item_category", "period", "current_value"],
+    )
+    return build_wide(df_up, cname)
+
+def build_wide(df_up, cname):
+    """Header rows and one data row per item_category from upcoming (item_category, period, current_value) rows."""
+    import pandas as pd
+
     # Chronologically sorted upcoming period labels
     df_up["period_dt"] = pd.to_datetime(df_up["period"], format="%b-%Y")
     periods_sorted = (
@@ -209,62 +186,63 @@ def paste_to_sheet(header1, header2, data_rows, worksheet_name, cname):
         log.warning(f"⚠️  {cname}: No data rows. Skipping {worksheet_name}.")
         return
 
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = service_account.Credentials.from_service_account_file(
-        "service_account.json", scopes=scope
-    )
-    client = gspread.authorize(creds)
-    sheet  = client.open_by_key(SHEET_KEY)
-    worksheet = sheet.worksheet(worksheet_name)
+    worksheet = get_sheets().worksheet(SHEET_KEY, worksheet_name)
+
+    import pytz
 
-    worksheet.update("A1", [header1], value_input_option="RAW")
-    worksheet.update("A2", [header2], value_input_option="RAW")
-    worksheet.update("A3", data_rows,  value_input_option="USER_ENTERED")
+    paste_rows(worksheet, [header1, header2], data_rows)
 
     tz = pytz.timezone("Asia/Dhaka")
     timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
     log.info(f"✅ '{worksheet_name}' updated at {timestamp}")
 
+# ========= WRITE OUTPUTS ==========
+def write_outputs(header1, header2, data_rows, cid_str, cname):
+    if data_rows:
+        # Save locally to Excel (header1 as columns, header2 + data as rows)
+        ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        output_file = f"{cname.lower().replace(' ', '_')}_upcoming_{ts}.xlsx"
+        col_names = header1[:]
+        col_names[0] = "Item Category"
+        all_rows = [header2] + data_rows
+        import pandas as pd
+        df_out = pd.DataFrame(all_rows, columns=col_names)
+        df_out.to_excel(output_file, index=False)
+        log.info(f"[SAVED] {output_file}  ({len(data_rows)} rows)")
+        append_snapshot(table_frame(header1, header2, data_rows), "upcoming", cname)
+
+        # Push to Google Sheets
+        worksheet_name = WORKSHEET_MAP[cid_str]
+        try:
+            paste_to_sheet(header1, header2, data_rows, worksheet_name, cname)
+        except Exception as e:
+            log.error(f"❌ Sheets upload failed for {cname}: {e}")
+    else:
+        log.error(f"[ERROR] No upcoming data rows for {cname}")
+
+# ========= PROCESS COMPANY ==========
+def build_company_table(cid_str, cname):
+    if READ_GROUP:
+        try:
+            return transform_groups_to_wide(fetch_upcoming_groups(cid_str, cname), cname)
+        except OdooRPCError as e:
+            log.warning(f"⚠️ {cname}: read_group failed ({e}) — falling back to raw rows")
+    return transform_to_wide(get_raw_rows(), cid_str, cname)
+
+def process_company(cid_str, cname):
+    log.info(f"\n{'='*55}")
+    log.info(f"🏭 Processing: {cname} (company_id={cid_str})")
+
+    write_outputs(*build_company_table(cid_str, cname), cid_str, cname)
+
 # ========= MAIN ==========
 if __name__ == "__main__":
-    login()
+    client.login()
 
-    # Fetch all upcoming data in a single API call (covers both companies)
-    raw_rows = fetch_upcoming_data()
+    if not READ_GROUP:
+        # Fetch all upcoming data in a single API call (covers both companies)
+        if not get_raw_rows():
+            log.error("[ERROR] No data returned from API")
+            raise SystemExit(1)
 
-    if not raw_rows:
-        log.error("[ERROR] No data returned from API")
-        raise SystemExit(1)
-
-    for cid_str, cname in COMPANIES.items():
-        log.info(f"\n{'='*55}")
-        log.info(f"🏭 Processing: {cname} (company_id={cid_str})")
-
-        if not switch_company(int(cid_str)):
-            log.error(f"❌ Skipping {cname} — company switch failed")
-            continue
-
-        header1, header2, data_rows = transform_to_wide(raw_rows, cid_str, cname)
-
-        if data_rows:
-            # Save locally to Excel (header1 as columns, header2 + data as rows)
-            ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-            output_file = f"{cname.lower().replace(' ', '_')}_upcoming_{ts}.xlsx"
-            col_names = header1[:]
-            col_names[0] = "Item Category"
-            all_rows = [header2] + data_rows
-            df_out = pd.DataFrame(all_rows, columns=col_names)
-            df_out.to_excel(output_file, index=False)
-            log.info(f"[SAVED] {output_file}  ({len(data_rows)} rows)")
-
-            # Push to Google Sheets
-            worksheet_name = WORKSHEET_MAP[cid_str]
-            try:
-                paste_to_sheet(header1, header2, data_rows, worksheet_name, cname)
-            except Exception as e:
-                log.error(f"❌ Sheets upload failed for {cname}: {e}")
-        else:
-            log.error(f"[ERROR] No upcoming data rows for {cname}")
+    client.for_each_company(COMPANIES, process_company)
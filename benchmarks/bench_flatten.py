@@ -0,0 +1,86 @@
+"""
+Benchmark: per-record flatten() loop vs ingest.decode_columns on synthetic stock.ageing pages.
+
+    python benchmarks/bench_flatten.py                 # 10k, 100k, 1M records
+    python benchmarks/bench_flatten.py 10000 100000    # custom sizes
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingest import decode_columns  # noqa: E402
+
+LABELS = {
+    "parent_category": "Product", "product_category": "Category", "product_id": "Item",
+    "lot_id": "Invoice", "receive_date": "Receive Date", "shipment_mode": "Shipment Mode",
+    "slot_1": "0-30", "slot_2": "31-60", "slot_3": "61-90", "slot_4": "91-180",
+    "slot_5": "181-365", "slot_6": "365+", "duration": "Duration", "cloing_qty": "Quantity",
+    "cloing_value": "Value", "landed_cost": "Landed Cost", "lot_price": "Price",
+    "pur_price": "Pur Price", "rejected": "Rejected", "company_id": "Company",
+}
+SPECIFICATION = {
+    k: ({"fields": {"display_name": {}}} if k.endswith("_id") or k.endswith("_category") else {})
+    for k in LABELS
+}
+
+
+def make_records(n):
+    rnd = random.Random(42)
+    records = []
+    for i in range(n):
+        rec = {"id": i + 1}
+        for field, spec in SPECIFICATION.items():
+            if spec:
+                ref = rnd.randint(1, 200)
+                rec[field] = {"id": ref, "display_name": f"{field} {ref}"}
+            elif field in ("receive_date",):
+                rec[field] = "2025-09-15"
+            elif field == "shipment_mode":
+                rec[field] = "sea"
+            else:
+                rec[field] = round(rnd.random() * 1000, 2)
+        records.append(rec)
+    return records
+
+
+def flatten_loop(records):
+    """The per-record loop the scripts used before ingest.decode_columns."""
+    def flatten(record):
+        flat = {}
+        for k, v in record.items():
+            if isinstance(v, dict) and "display_name" in v:
+                flat[LABELS.get(k, k)] = v["display_name"]
+            else:
+                flat[LABELS.get(k, k)] = v
+        return flat
+    return pd.DataFrame([flatten(rec) for rec in records])
+
+
+def columnar(records):
+    return pd.DataFrame(decode_columns(records, SPECIFICATION, LABELS))
+
+
+def timed(fn, records, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(records)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'records':>10} {'flatten loop':>14} {'columnar':>10} {'speedup':>8}")
+    for n in sizes:
+        records = make_records(n)
+        assert flatten_loop(records[:100]).equals(columnar(records[:100]))
+        repeat = 3 if n <= 100_000 else 1
+        loop_s = timed(flatten_loop, records, repeat)
+        col_s = timed(columnar, records, repeat)
+        print(f"{n:>10} {loop_s:>13.3f}s {col_s:>9.3f}s {loop_s / col_s:>7.1f}x")
+        del records
@@ -0,0 +1,53 @@
+"""
+Benchmark: writing and reading an opening/closing report frame in every outputs.py format,
+including both xlsx writers. Frames come from the fake Odoo server; files go to a temp dir.
+
+    python benchmarks/bench_outputs.py                # 5k, 50k rows
+    python benchmarks/bench_outputs.py 1000 100000    # custom sizes
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_sheets_payload import fetch_frame  # noqa: E402
+
+import outputs  # noqa: E402
+
+READERS = {
+    "xlsx": "read_excel",
+    "parquet": "read_parquet",
+    "feather": "read_feather",
+    "csv.gz": "read_csv",
+}
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    logging.getLogger().setLevel(logging.WARNING)
+    sizes = [int(a) for a in sys.argv[1:]] or [5000, 50000]
+    cases = [("xlsx", "pandas"), ("xlsx", "stream"), ("parquet", None), ("feather", None), ("csv.gz", None)]
+
+    print(f"{'rows':>7} {'format':<15} {'write':>8} {'read':>8} {'size MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = fetch_frame(n)
+            for fmt, writer in cases:
+                label = f"{fmt} ({writer})" if writer else fmt
+                if fmt in ("parquet", "feather") and not outputs.HAS_ARROW:
+                    print(f"{len(df):>7} {label:<15} {'skipped — pyarrow not installed':>26}")
+                    continue
+                outputs.XLSX_WRITER = writer or outputs.XLSX_WRITER
+                path = os.path.join(tmp, f"bench_{n}{outputs.EXTENSIONS[fmt]}")
+                write = timed(outputs.WRITERS[fmt], df, path)
+                read = timed(getattr(pd, READERS[fmt]), path)
+                print(f"{len(df):>7} {label:<15} {write:>7.3f}s {read:>7.3f}s {os.path.getsize(path) / 2**20:>8.1f}")
@@ -0,0 +1,104 @@
+"""
+Benchmark: building the Google Sheets payload of an opening/closing report frame three ways —
+gspread_dataframe.set_with_dataframe (a Cell per value), cell values (SHEETS_WRITE_MODE=replace)
+and one tab-separated pasteData text (SHEETS_WRITE_MODE=paste). Frames come from the fake Odoo
+server, nothing is sent to Google: the worksheet below only records what would be sent.
+
+    python benchmarks/bench_sheets_payload.py                 # 5k, 20k, 50k rows
+    python benchmarks/bench_sheets_payload.py 1000 100000     # custom sizes
+"""
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.environ.update({"ODOO_SESSION_CACHE": "", "ODOO_WIZARD_TTL": "0", "ODOO_CASSETTE_MODE": ""})
+
+import fake_odoo  # noqa: E402
+
+
+class RecordingWorksheet:
+    """Just enough of gspread's Worksheet for set_with_dataframe; keeps the request body."""
+
+    id = 0
+    title = "bench"
+
+    def __init__(self):
+        self.row_count, self.col_count, self.body = 1000, 26, None
+
+    def resize(self, rows=None, cols=None):
+        self.row_count, self.col_count = rows or self.row_count, cols or self.col_count
+
+    def update_cells(self, cells, value_input_option=None):
+        # gspread turns the Cell list into a rows × cols values body
+        rows = {}
+        for cell in cells:
+            rows.setdefault(cell.row, {})[cell.col] = cell.value
+        width = max(cell.col for cell in cells)
+        self.body = {"values": [[r.get(c, "") for c in range(1, width + 1)] for _, r in sorted(rows.items())]}
+
+
+def gspread_dataframe_body(df):
+    from gspread_dataframe import set_with_dataframe
+
+    ws = RecordingWorksheet()
+    set_with_dataframe(ws, df)
+    return ws.body
+
+
+def values_body(df):
+    import sheets
+    return {"valueInputOption": "USER_ENTERED", "data": [{"range": "A1", "values": sheets.frame_rows(df)}]}
+
+
+def paste_body(df):
+    import sheets
+    return {"requests": [request for request, _ in sheets.paste_requests(RecordingWorksheet(), df)]}
+
+
+def measure(build, df, repeat=3):
+    """Best build + JSON encode time, peak traced memory (MB) and body size (MB)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = json.dumps(build(df))
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    json.dumps(build(df))
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return best, peak, len(payload) / 2**20
+
+
+def fetch_frame(rows):
+    """stock_register frame of company 1 from a fake Odoo server with `rows` rows per company."""
+    import opening_closing as oc
+    from odoo_client import OdooClient
+
+    server = fake_odoo.serve(port=0, rows=rows)
+    client = OdooClient(url=f"http://127.0.0.1:{server.server_port}", db="bench", username="bench", password="bench")
+    client.login()
+    oc.prepare_forecast_wizard(client, 1, oc.REPORTS["stock_register"]["from_date"], oc.TO_DATE)
+    df = oc.fetch_opening_closing(client, 1, "Zipper")
+    server.shutdown()
+    return df[oc.REPORTS["stock_register"]["columns"]]
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    sizes = [int(a) for a in sys.argv[1:]] or [5000, 20000, 50000]
+
+    print(f"{'rows':>7} {'payload':<18} {'build':>8} {'peak MB':>8} {'body MB':>8}")
+    from ingest import export_view
+
+    for n in sizes:
+        df = export_view(fetch_frame(n))
+        for name, build in (("gspread_dataframe", gspread_dataframe_body), ("cell values", values_body),
+                            ("pasteData text", paste_body)):
+            seconds, peak, size = measure(build, df)
+            print(f"{len(df):>7} {name:<18} {seconds:>7.3f}s {peak:>8.1f} {size:>8.1f}")
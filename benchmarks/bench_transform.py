@@ -0,0 +1,72 @@
+"""
+Benchmark: transform_to_wide of Upcoming.py and products_180.py on responses replayed from
+an Odoo cassette (see cassette.py), optionally scaled up by repeating categories.
+
+    ODOO_CASSETTE_MODE=record python Upcoming.py && ODOO_CASSETTE_MODE=record python products_180.py
+    python benchmarks/bench_transform.py                  # replay ./cassettes
+    python benchmarks/bench_transform.py cassettes 10 100  # cassette dir, scale factors
+"""
+import copy
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["ODOO_CASSETTE_MODE"] = "replay"
+os.environ["ODOO_CASSETTE_DIR"] = sys.argv[1] if len(sys.argv) > 1 else "cassettes"
+
+import Upcoming  # noqa: E402
+import products_180  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+
+def scale_raw_rows(rows, factor):
+    """Upcoming rows repeated `factor` times under distinct item categories."""
+    out = []
+    for n in range(factor):
+        for row in rows:
+            out.append({**row, "item_category": f"{row.get('item_category')} #{n}"} if n else row)
+    return out
+
+
+def scale_summary(result, factor):
+    """Ageing summary response with its categories repeated `factor` times."""
+    result = copy.deepcopy(result)
+    cats = result.get("item_categories", [])
+    data = result.get("data", {})
+    for n in range(1, factor):
+        for cat in cats:
+            data[f"{cat} #{n}"] = data.get(cat, {})
+    result["item_categories"] = cats + [f"{c} #{n}" for n in range(1, factor) for c in cats]
+    return result
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    factors = [int(a) for a in sys.argv[2:]] or [1, 10, 100]
+    Upcoming.client.login()
+    raw_rows = Upcoming.fetch_upcoming_data()
+    summaries = {cid: products_180.fetch_ageing_data(cid, cname) for cid, cname in products_180.COMPANIES.items()}
+
+    print(f"{'report':<12} {'company':<12} {'scale':>6} {'input':>9} {'transform':>10}")
+    for factor in factors:
+        rows = scale_raw_rows(raw_rows, factor)
+        for cid, cname in Upcoming.COMPANIES.items():
+            s = timed(Upcoming.transform_to_wide, rows, cid, cname)
+            print(f"{'Upcoming':<12} {cname:<12} {factor:>5}x {len(rows):>9} {s:>9.3f}s")
+        for cid, result in summaries.items():
+            result = scale_summary(result, factor)
+            cname = products_180.COMPANIES[cid]
+            s = timed(products_180.transform_to_wide, result, cname)
+            print(f"{'products_180':<12} {cname:<12} {factor:>5}x {len(result.get('item_categories', [])):>9} {s:>9.3f}s")
@@ -0,0 +1,340 @@
+"""
+Local stand-in for the Odoo JSON-RPC endpoints the report scripts use, serving synthetic
+stock.ageing / stock.opening.closing / rm.ageing.raw.data rows at a configurable volume
+and latency, so the pipeline can be load-tested without production Odoo.
+
+    python benchmarks/fake_odoo.py --rows 50000 --latency 0.05 --compute-latency 2
+    ODOO_URL=http://127.0.0.1:8069 ODOO_DB=bench ODOO_USERNAME=bench ODOO_PASSWORD=bench python Current_Stock.py
+
+Rows are generated deterministically from their index, so volumes of 10x-100x production
+cost CPU per page served rather than memory.
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger("fake_odoo")
+
+COMPANIES = {1: "Zipper", 3: "Metal Trims"}
+UID = 2
+
+CATEGORIES = [f"RM / Category {i:02d}" for i in range(40)]
+PARENTS = ["Zipper RM", "Metal RM", "Chemicals", "Packing", "Spare Parts"]
+VENDORS = [f"Vendor {i:03d}" for i in range(120)]
+SLOTS = ["slot_1", "slot_2", "slot_3", "slot_4", "slot_5", "slot_6"]
+
+
+# ========= SYNTHETIC DATA ==========
+class Dataset:
+    """Deterministic synthetic rows: row `i` of a (model, company) is always the same."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def base_row(self, model, company_id, i):
+        rnd = random.Random(f"{model}:{company_id}:{i}")  # str seeds are stable across processes, hash() is not
+        cat = CATEGORIES[rnd.randrange(len(CATEGORIES))]
+        row = {
+            "id": company_id * 10_000_000 + i + 1,
+            "company_id": company_id,
+            "parent_category": PARENTS[rnd.randrange(len(PARENTS))],
+            "product_category": cat,
+            "item_category": cat,
+            "classification_id": rnd.choice(["A", "B", "C"]),
+            "product_id": f"[RM{rnd.randrange(5000):05d}] Raw material {rnd.randrange(5000)}",
+            "pr_code": f"RM{rnd.randrange(5000):05d}",
+            "lot_id": f"INV/{2024 + rnd.randrange(3)}/{rnd.randrange(100000):06d}",
+            "partner_id": VENDORS[rnd.randrange(len(VENDORS))],
+            "product_uom": rnd.choice(["Pcs", "Kg", "Mtr", "Yds"]),
+            "product_type": rnd.choice(["Zipper", "Button", "Rivet"]),
+            "receive_date": (date(2024, 1, 1) + timedelta(days=rnd.randrange(700))).isoformat(),
+            "shipment_mode": rnd.choice(["sea", "air", "road"]),
+            "po_type": rnd.choice(["local", "foreign"]),
+            "po_number": f"PO{rnd.randrange(100000):06d}",
+            "duration": rnd.randrange(1, 720),
+            "unusable": rnd.random() < 0.2,
+        }
+        for key in ("cloing_qty", "opening_qty", "receive_qty", "issue_qty"):
+            row[key] = round(rnd.random() * 5000, 2)
+        for key in ("cloing_value", "opening_value", "receive_value", "issue_value", "landed_cost"):
+            row[key] = round(rnd.random() * 500000, 2)
+        for key in ("lot_price", "pur_price"):
+            row[key] = round(rnd.random() * 50, 4)
+        hot = rnd.randrange(len(SLOTS))
+        for n, slot in enumerate(SLOTS):
+            row[slot] = row["cloing_value"] if n == hot else 0.0
+        row["rejected"] = round(rnd.random() * 10, 2) if rnd.random() < 0.1 else 0.0
+        # rm.ageing.raw.data
+        months_ahead = rnd.randrange(-1, 6)
+        period = date.today().replace(day=1) + timedelta(days=31 * max(months_ahead, 0))
+        row["bucket"] = "180_plus" if months_ahead < 0 else f"upcoming_{months_ahead}"
+        row["period"] = period.strftime("%b-%Y")
+        row["classification"] = row["classification_id"]
+        row["closing_value"] = row["cloing_value"]
+        row["current_value"] = round(row["cloing_value"] * rnd.random(), 2)
+        row["utilization"] = round(rnd.random(), 4)
+        # A few empty relations and selections, which Odoo sends as False
+        for key in ("lot_id", "partner_id", "shipment_mode"):
+            if rnd.random() < 0.05:
+                row[key] = False
+        return row
+
+    def matching(self, model, company_ids, domain):
+        """Row indexes per company matching `domain` (cached per query)."""
+        key = (model, tuple(company_ids), json.dumps(domain))
+        with self._lock:
+            if key in self._ids:
+                return self._ids[key]
+        ids = [
+            (cid, i) for cid in company_ids for i in range(self.rows)
+            if match_domain(self.base_row(model, cid, i), domain)
+        ]
+        with self._lock:
+            self._ids[key] = ids
+        return ids
+
+
+def match_domain(row, domain):
+    """Evaluate a prefix-notation Odoo domain on a flat row; dotted paths are treated as true."""
+    def leaf(term):
+        field, op, value = term
+        if "." in field or field not in row:
+            return True
+        v = row[field]
+        if isinstance(v, int) and not isinstance(v, bool):
+            # Odoo coerces "1" to 1 for integer and many2one columns
+            value = [int(x) for x in value] if op == "in" else int(value) if isinstance(value, str) else value
+        if op == "=":
+            return v == value
+        if op == "!=":
+            return v != value
+        if op == ">":
+            return v > value
+        if op == ">=":
+            return v >= value
+        if op == "<":
+            return v < value
+        if op == "<=":
+            return v <= value
+        if op == "in":
+            return v in value
+        if op == "=like":
+            return str(v).startswith(value.rstrip("%"))
+        if op == "ilike":
+            return str(value).lower() in str(v).lower()
+        return True
+
+    def parse(pos):
+        term = domain[pos]
+        if term == "&":
+            a, pos = parse(pos + 1)
+            b, pos = parse(pos)
+            return a and b, pos
+        if term == "|":
+            a, pos = parse(pos + 1)
+            b, pos = parse(pos)
+            return a or b, pos
+        if term == "!":
+            a, pos = parse(pos + 1)
+            return not a, pos
+        return leaf(term), pos + 1
+
+    pos, result = 0, True
+    while pos < len(domain):
+        value, pos = parse(pos)
+        result = result and value
+    return result
+
+
+def render(row, specification):
+    """Shape a synthetic row like web_search_read would for `specification`."""
+    rec = {"id": row["id"]}
+    for field, spec in specification.items():
+        if field == "company_id":
+            value = COMPANIES[row["company_id"]]
+        else:
+            value = row.get(field, 0.0)
+        subfields = (spec or {}).get("fields")
+        if subfields and value is False:
+            rec[field] = False
+        elif subfields:
+            rel = {"id": zlib.crc32(str(value).encode()) % 100000 + 1, "display_name": value}
+            for sub in subfields:
+                if sub not in rel:
+                    rel[sub] = row.get(sub, False)
+            rec[field] = rel
+        else:
+            rec[field] = value
+    return rec
+
+
+# ========= JSON-RPC ==========
+class FakeOdoo:
+    def __init__(self, rows, latency, compute_latency):
+        self.data = Dataset(rows)
+        self.latency = latency
+        self.compute_latency = compute_latency
+        self.sessions = set()
+        self.wizard_seq = 0
+        self.lock = threading.Lock()
+
+    def next_wizard(self):
+        with self.lock:
+            self.wizard_seq += 1
+            return self.wizard_seq
+
+    def call_kw(self, params):
+        model, method = params.get("model"), params.get("method")
+        args, kwargs = params.get("args") or [], params.get("kwargs") or {}
+        context = kwargs.get("context") or {}
+        companies = context.get("allowed_company_ids") or list(COMPANIES)
+        if model == "res.users" and method == "write":
+            return True
+        if method == "create" and model == "stock.ageing":
+            return [{"id": self.next_wizard()}]
+        if method == "create":
+            return self.next_wizard()
+        if method == "web_save":
+            return [{"id": self.next_wizard(), **(args[1] if len(args) > 1 else {})}]
+        if method == "web_search_read":
+            ids = self.data.matching(model, companies[:1], kwargs.get("domain") or [])
+            offset, limit = kwargs.get("offset", 0), kwargs.get("limit") or len(ids)
+            window = ids[offset:offset + limit]
+            spec = kwargs.get("specification") or {}
+            return {
+                "length": len(ids),
+                "records": [render(self.data.base_row(model, cid, i), spec) for cid, i in window],
+            }
+        if method == "search_read":
+            ids = self.data.matching(model, companies, kwargs.get("domain") or [])
+            fields = kwargs.get("fields") or []
+            rows = (self.data.base_row(model, cid, i) for cid, i in ids)
+            return [{"id": r["id"], **{f: r.get(f, False) for f in fields}} for r in rows]
+        if method == "read_group":
+            return self.read_group(model, companies, kwargs)
+        if method == "retrive_ageing_by_item_cat_data":
+            return self.ageing_summary(int(args[0]))
+        raise KeyError(f"{model}.{method} is not implemented by the fake server")
+
+    def read_group(self, model, companies, kwargs):
+        groupby = kwargs.get("groupby") or []
+        fields = [f.split(":")[0] for f in kwargs.get("fields") or []]
+        groups = {}
+        for cid, i in self.data.matching(model, companies, kwargs.get("domain") or []):
+            row = self.data.base_row(model, cid, i)
+            key = tuple(row[g] for g in groupby)
+            group = groups.setdefault(key, {**dict(zip(groupby, key)), "__count": 0, **{f: 0.0 for f in fields if f not in groupby}})
+            group["__count"] += 1
+            for f in fields:
+                if f not in groupby:
+                    group[f] += row.get(f, 0.0)
+        return list(groups.values())
+
+    def ageing_summary(self, company_id):
+        today = date.today()
+        months = []
+        cursor = today
+        for _ in range(6):
+            months.append(cursor.isoformat())
+            cursor = cursor.replace(day=1) - timedelta(days=1)
+        rnd = random.Random(company_id)
+        data = {
+            cat: {"months": {m: {"slot_value": round(rnd.random() * 1e6, 2), "slot_qty": round(rnd.random() * 1e4, 2)} for m in months}}
+            for cat in CATEGORIES
+        }
+        return {
+            "success": True,
+            "months": months,
+            "month_display": [date.fromisoformat(m).strftime("%b %Y") for m in months],
+            "item_categories": CATEGORIES,
+            "data": data,
+        }
+
+
+def make_handler(odoo):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like Odoo behind a proxy
+
+        def log_message(self, fmt, *args):
+            log.debug(fmt % args)
+
+        def reply(self, payload, cookie=None):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if cookie:
+                self.send_header("Set-Cookie", f"session_id={cookie}; Path=/; HttpOnly")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def error(self, name, message):
+            return {"code": 200, "message": "Odoo Server Error", "data": {"name": name, "message": message}}
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            params = request.get("params") or {}
+            session = (self.headers.get("Cookie") or "").partition("session_id=")[2].split(";")[0]
+            time.sleep(odoo.latency)
+
+            if self.path == "/web/session/authenticate":
+                sid = uuid.uuid4().hex
+                odoo.sessions.add(sid)
+                result = {"uid": UID, "user_companies": {"allowed_companies": {str(c): {"id": c, "name": n} for c, n in COMPANIES.items()}}}
+                return self.reply({"jsonrpc": "2.0", "id": request.get("id"), "result": result}, cookie=sid)
+
+            if session not in odoo.sessions:
+                err = self.error("odoo.http.SessionExpiredException", "Session expired")
+                return self.reply({"jsonrpc": "2.0", "id": request.get("id"), "error": err})
+
+            try:
+                if self.path == "/web/session/get_session_info":
+                    result = {"uid": UID, "user_companies": {}}
+                elif self.path == "/web/dataset/call_button":
+                    time.sleep(odoo.compute_latency)
+                    result = {"type": "ir.actions.act_window", "res_model": params.get("model")}
+                elif self.path.startswith("/web/dataset/call_kw"):
+                    result = odoo.call_kw(params)
+                else:
+                    raise KeyError(f"{self.path} is not implemented by the fake server")
+            except Exception as e:
+                err = self.error(type(e).__name__, str(e))
+                return self.reply({"jsonrpc": "2.0", "id": request.get("id"), "error": err})
+            return self.reply({"jsonrpc": "2.0", "id": request.get("id"), "result": result})
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8069, rows=5000, latency=0.0, compute_latency=0.0):
+    """Start the fake server on a background thread and return it (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(FakeOdoo(rows, latency, compute_latency)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8069)
+    parser.add_argument("--rows", type=int, default=5000, help="rows per company per model")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--compute-latency", type=float, default=0.0, help="seconds added to call_button computes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = serve(args.host, args.port, args.rows, args.latency, args.compute_latency)
+    log.info(f"🧪 Fake Odoo on http://{args.host}:{server.server_port} ({args.rows} rows/company/model)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
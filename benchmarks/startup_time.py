@@ -0,0 +1,62 @@
+"""
+Startup report: import time of every entry point, measured with `python -X importtime`
+in a fresh interpreter, and which heavy libraries each one loads before doing any work.
+
+    python benchmarks/startup_time.py                     # all entry points
+    python benchmarks/startup_time.py Upcoming run_reports
+    python benchmarks/startup_time.py --budget-ms 300     # exit 1 when an entry point is slower
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "Closing", "Current_Stock", "180_useable_notUseable", "Mt_Zip_Ageing",
+    "Mt_Zip_db", "rm_rejection", "products_180", "Upcoming", "run_reports",
+]
+HEAVY = ["pandas", "numpy", "gspread", "gspread_dataframe", "google.oauth2", "pytz", "openpyxl"]
+
+
+def import_profile(module):
+    """{top-level module: cumulative µs} for a fresh `import module`."""
+    code = f"import importlib; importlib.import_module({module!r})"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"{module} failed to import:\n{proc.stderr[-2000:]}")
+    loaded = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        loaded[name.strip()] = int(cumulative)
+        if not name.startswith("  "):
+            loaded.setdefault("__top__", 0)
+            loaded["__top__"] += int(cumulative)
+    return loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--budget-ms", type=float, help="fail when an entry point imports slower than this")
+    args = parser.parse_args()
+
+    over = []
+    print(f"{'entry point':<24} {'import ms':>10}  heavy libraries loaded")
+    for module in args.modules:
+        loaded = import_profile(module)
+        total_ms = loaded.pop("__top__", 0) / 1000
+        heavy = [h for h in HEAVY if h in loaded]
+        print(f"{module:<24} {total_ms:>10.0f}  {', '.join(heavy) or '-'}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over.append(module)
+
+    if over:
+        print(f"❌ Over the {args.budget_ms:.0f} ms budget: {', '.join(over)}")
+        raise SystemExit(1)
@@ -0,0 +1,92 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+CASSETTE_MODE = os.getenv("ODOO_CASSETTE_MODE", "")          # "record", "replay" or "" (live)
+CASSETTE_DIR = os.getenv("ODOO_CASSETTE_DIR", "cassettes")    # one .json.gz file per RPC call
+
+# Session endpoints are never recorded: a replay skips login entirely
+SESSION_PATHS = {"/web/session/authenticate", "/web/session/get_session_info"}
+
+
+class CassetteMissError(LookupError):
+    """Replay asked for a call that was not recorded."""
+
+
+# ========= CASSETTE ==========
+class Cassette:
+    """
+    Records Odoo JSON-RPC responses to gzip JSON files keyed by (path, params), and plays
+    them back. Keys ignore the context uid and treat the run date as "{today}", so a
+    cassette recorded yesterday still replays date-relative scripts today.
+    """
+
+    def __init__(self, path=CASSETTE_DIR, mode=CASSETTE_MODE):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.today = date.today().isoformat()
+        if mode == "record":
+            os.makedirs(path, exist_ok=True)
+        log.info(f"📼 Odoo cassette {mode}: {path}")
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _normalize(self, value):
+        if isinstance(value, dict):
+            return {k: self._normalize(v) for k, v in value.items() if k != "uid"}
+        if isinstance(value, (list, tuple)):
+            return [self._normalize(v) for v in value]
+        if isinstance(value, str) and self.today in value:
+            return value.replace(self.today, "{today}")
+        return value
+
+    def key(self, path, params):
+        canonical = json.dumps([path, self._normalize(params)], sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode()).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.json.gz")
+
+    # ---- session ----
+    def save_session(self, uid):
+        with open(os.path.join(self.path, "session.json"), "w") as f:
+            json.dump({"uid": uid, "recorded_on": self.today}, f)
+
+    def load_session(self):
+        try:
+            with open(os.path.join(self.path, "session.json")) as f:
+                return json.load(f)
+        except OSError:
+            raise CassetteMissError(f"No recorded session in {self.path}") from None
+
+    # ---- calls ----
+    def record(self, path, params, result=None, error=None):
+        entry = {"path": path, "params": params, "result": result, "error": error}
+        tmp = f"{self._file(self.key(path, params))}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp, tmp[:-4])
+
+    def play(self, path, params):
+        """Recorded entry for the call: {"result": ...} or {"error": <Odoo error dict>}."""
+        try:
+            with gzip.open(self._file(self.key(path, params)), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            model = params.get("model", "")
+            raise CassetteMissError(f"No recorded response for {path} {model}.{params.get('method', '')}") from None
+
+
+def get_cassette():
+    """Cassette configured by ODOO_CASSETTE_MODE, or None for live runs."""
+    return Cassette() if CASSETTE_MODE else None
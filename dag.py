@@ -0,0 +1,83 @@
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+DAG_WORKERS = int(os.getenv("RUN_WORKERS", "4"))  # nodes executed at once
+
+
+class Dag:
+    """
+    Small dependency graph of named steps. Each node runs once, as soon as all of its
+    dependencies have finished, and receives their results as positional arguments, so
+    intermediate results (a computed wizard, a fetched frame) are shared by every node
+    that depends on them. A failed node skips its dependents; independent branches go on.
+    `after` nodes only order a step: it waits for them to finish, whatever the outcome,
+    and does not receive their results.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.results = {}
+        self.failed = {}
+        self.skipped = []
+        self.timings = {}
+
+    def add(self, name, fn, deps=(), after=()):
+        """Register `name` unless already present (same name = same shared step); returns `name`."""
+        if name not in self.nodes:
+            missing = [d for d in (*deps, *after) if d not in self.nodes]
+            if missing:
+                raise KeyError(f"{name} depends on unknown node(s): {', '.join(missing)}")
+            self.nodes[name] = (fn, tuple(deps), tuple(after))
+        return name
+
+    def finished(self, name):
+        return name in self.results or name in self.failed or name in self.skipped
+
+    def _call(self, name, fn, args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def run(self, workers=DAG_WORKERS):
+        """Execute every node; returns True when none failed."""
+        pending = dict(self.nodes)
+        running = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                # Nodes are registered after their dependencies, so one pass settles skips in order
+                for name, (fn, deps, after) in list(pending.items()):
+                    if any(d in self.failed or d in self.skipped for d in deps):
+                        del pending[name]
+                        self.skipped.append(name)
+                        log.warning(f"⏭️ {name} skipped — a dependency failed")
+                    elif all(d in self.results for d in deps) and all(self.finished(a) for a in after):
+                        del pending[name]
+                        args = [self.results[d] for d in deps]
+                        running[pool.submit(self._call, name, fn, args)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                        log.info(f"✔️ {name} ({self.timings[name]:.1f}s)")
+                    except Exception as e:
+                        self.failed[name] = e
+                        log.error(f"❌ {name} failed: {e}")
+
+        wall = time.perf_counter() - start
+        log.info(
+            f"⏱️ {len(self.results)}/{len(self.nodes)} steps done in {wall:.1f}s "
+            f"(sum of step times {sum(self.timings.values()):.1f}s, "
+            f"{len(self.failed)} failed, {len(self.skipped)} skipped)"
+        )
+        return not self.failed and not self.skipped
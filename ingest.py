@@ -0,0 +1,237 @@
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from odoo_client import FETCH_WORKERS
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+TRACE_MEMORY = os.getenv("INGEST_TRACE_MEMORY", "0") == "1"  # exact Python allocation peak (slower)
+
+
+# ========= DTYPE SCHEMAS ==========
+# Keyed by the labelled column names the reports publish. Repeated names are interned as
+# categoricals; Receive Date becomes datetime64 (rendered back to text by export_view).
+_AGEING_SLOTS = ["0-30", "31-60", "61-90", "91-180", "181-365", "365+"]
+
+AGEING_SCHEMA = {
+    "Product": "category",
+    "Category": "category",
+    "Item": "category",
+    "Invoice": "category",
+    "Company": "category",
+    "Shipment Mode": "category",
+    "Receive Date": "datetime64[ns]",
+    **{slot: "float64" for slot in _AGEING_SLOTS},
+    "Duration": "float64",
+    "Quantity": "float64",
+    "Value": "float64",
+    "Landed Cost": "float64",
+    "Price": "float64",
+    "Pur Price": "float64",
+}
+
+OPENING_CLOSING_SCHEMA = {
+    "Product": "category",
+    "Category": "category",
+    "Classification": "category",
+    "Item": "category",
+    "Item Code": "category",
+    "Invoice": "category",
+    "Unit": "category",
+    "Vendor": "category",
+    "Po Type": "category",
+    "Shipment Mode": "category",
+    "Product Type": "category",
+    "Item Type": "category",
+    "Receive Date": "datetime64[ns]",
+    "Pur Price": "float64",
+    "Landed Cost": "float64",
+    "Price": "float64",
+    "Opening Quantity": "float64",
+    "Opening Value": "float64",
+    "Receive Quantity": "float64",
+    "Receive Value": "float64",
+    "Issue Quantity": "float64",
+    "Issue Value": "float64",
+    "Closing Quantity": "float64",
+    "Closing Value": "float64",
+}
+
+
+def apply_schema(df, schema):
+    """Cast the columns of `df` named in `schema` in place and return it."""
+    import pandas as pd
+
+    before = df.memory_usage(deep=True).sum() if TRACE_MEMORY else None
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if dtype == "category":
+            # Odoo sends False for an empty text field too: missing, not a category
+            df[column] = df[column].where(df[column] != False).astype("category")  # noqa: E712
+        elif dtype.startswith("datetime64"):
+            # Odoo sends False for an empty date
+            df[column] = pd.to_datetime(df[column].where(df[column] != False), errors="coerce")  # noqa: E712
+        else:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+    if before is not None:
+        after = df.memory_usage(deep=True).sum()
+        log.info(f"📏 dtype schema: {before / 2**20:.1f} MB → {after / 2**20:.1f} MB")
+    return df
+
+
+def export_view(df):
+    """
+    Frame for Excel/Sheets sinks: datetime columns rendered back to YYYY-MM-DD text and
+    missing names shown as False, as Odoo returns them.
+    """
+    view = {c: df[c].dt.strftime("%Y-%m-%d") for c in df.select_dtypes(include="datetime").columns}
+    for c in df.select_dtypes(include=["category", "object"]).columns:
+        missing = df[c].isna()
+        if missing.any():
+            view[c] = df[c].astype(object).where(~missing, False)
+    return df.assign(**view) if view else df
+
+
+# ========= MEMORY ==========
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+# Ingests run on several threads but tracemalloc is process-wide: it is started by the first
+# traced block and stopped by the last one, and a block that overlapped others says so
+_trace_lock = threading.Lock()
+_traced = {}  # active block → another block overlapped it
+_trace_owner = False
+
+
+@contextmanager
+def track_memory(label):
+    """Log wall time and peak memory of the wrapped block."""
+    global _trace_owner
+    token = object()
+    if TRACE_MEMORY:
+        with _trace_lock:
+            if not _traced and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _trace_owner = True
+            for other in _traced:
+                _traced[other] = True
+            _traced[token] = bool(_traced)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        msg = f"📏 {label}: {time.perf_counter() - start:.1f}s"
+        rss = peak_rss_mb()
+        if rss is not None:
+            msg += f", process peak RSS so far {rss:.0f} MB"
+        if TRACE_MEMORY:
+            with _trace_lock:
+                _, peak = tracemalloc.get_traced_memory()
+                overlapped = _traced.pop(token)
+                if not _traced and _trace_owner:
+                    tracemalloc.stop()
+                    _trace_owner = False
+            msg += f", Python peak {peak / 2**20:.1f} MB"
+            if overlapped:
+                msg += " (shared with concurrent ingests)"
+        log.info(msg)
+
+
+# ========= COLUMNAR DECODING ==========
+def _display(v):
+    return v["display_name"] if isinstance(v, dict) and "display_name" in v else v
+
+
+def decode_columns(records, specification, labels=None, with_ids=False):
+    """
+    Decode web_search_read records into {label: column} following `specification`, one
+    field at a time. Relational fields become their display_name column ("<label> ID" is
+    added with `with_ids`); any other requested sub-field becomes a "<field>.<sub>" column.
+    Empty relations become None (missing); export_view shows them as False again.
+    """
+    labels = labels or {}
+    columns = {}
+    if records and "id" in records[0]:
+        columns["id"] = [rec["id"] for rec in records]
+    for field, spec in specification.items():
+        values = [rec.get(field) for rec in records]
+        label = labels.get(field, field)
+        subfields = (spec or {}).get("fields")
+        if not subfields:
+            columns[label] = values
+            continue
+        columns[label] = [v["display_name"] if v else None for v in values]
+        if with_ids:
+            columns[f"{label} ID"] = [v["id"] if v else None for v in values]
+        for sub in subfields:
+            if sub not in ("display_name", "id"):
+                sub_key = f"{field}.{sub}"
+                columns[labels.get(sub_key, sub_key)] = [v.get(sub) if v else None for v in values]
+    return columns
+
+
+class ColumnBuffer:
+    """
+    Accumulates web_search_read pages straight into per-column lists, so each page's
+    record dicts can be released once appended and no per-row flattened copy is made.
+    With a `specification` pages are decoded by decode_columns; otherwise columns
+    follow the record keys.
+    """
+
+    def __init__(self, labels=None, specification=None, with_ids=False):
+        self.labels = labels or {}
+        self.specification = specification
+        self.with_ids = with_ids
+        self.columns = {}
+        self.rows = 0
+
+    def extend(self, records):
+        if not records:
+            return
+        if self.specification is not None:
+            page = decode_columns(records, self.specification, self.labels, self.with_ids)
+        else:
+            page = {self.labels.get(key, key): [_display(rec.get(key)) for rec in records] for key in records[0]}
+        for label, values in page.items():
+            self.columns.setdefault(label, [None] * self.rows).extend(values)
+        self.rows += len(records)
+
+    def to_frame(self):
+        import pandas as pd
+
+        df = pd.DataFrame(self.columns)
+        self.columns = {}  # drop the list copies as soon as the frame owns the data
+        return df
+
+
+# ========= FETCH ==========
+def fetch_frame(client, model, specification, domain=None, context=None, labels=None,
+                workers=FETCH_WORKERS, with_ids=False, schema=None, order=None):
+    """
+    Page through web_search_read (sorted by `order`, then id) and build a DataFrame column
+    by column, typed by `schema`.
+    """
+    buffer = ColumnBuffer(labels, specification, with_ids)
+    with track_memory(f"{model} ingest"):
+        for batch in client.iter_search_read(model, specification, domain=domain, context=context,
+                                             order=order, workers=workers):
+            buffer.extend(batch)
+        df = buffer.to_frame()
+        if schema:
+            apply_schema(df, schema)
+    return df
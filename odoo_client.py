@@ -0,0 +1,566 @@
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError, RequestException, Timeout
+from urllib3.exceptions import NewConnectionError
+from dotenv import load_dotenv
+
+from cassette import SESSION_PATHS, get_cassette
+
+try:
+    # Optional: orjson decodes large report pages several times faster than json
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+load_dotenv()
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+ODOO_URL = os.getenv("ODOO_URL")
+DB = os.getenv("ODOO_DB")
+USERNAME = os.getenv("ODOO_USERNAME")
+PASSWORD = os.getenv("ODOO_PASSWORD")
+
+CONNECT_TIMEOUT = float(os.getenv("ODOO_CONNECT_TIMEOUT", "10"))   # seconds to open a connection
+READ_TIMEOUT = float(os.getenv("ODOO_READ_TIMEOUT", "300"))        # seconds to wait for a response
+COMPUTE_TIMEOUT = float(os.getenv("ODOO_COMPUTE_TIMEOUT", "1800"))  # seconds to wait for a wizard compute; 0 waits indefinitely
+POOL_SIZE = int(os.getenv("ODOO_POOL_SIZE", "10"))                 # keep-alive connections kept open
+MAX_RETRIES = int(os.getenv("ODOO_MAX_RETRIES", "5"))               # attempts per call
+RETRY_BACKOFF = float(os.getenv("ODOO_RETRY_BACKOFF", "2"))         # first backoff, doubled per attempt
+RETRY_BACKOFF_CAP = float(os.getenv("ODOO_RETRY_BACKOFF_CAP", "60"))
+RETRY_BUDGET = int(os.getenv("ODOO_RETRY_BUDGET", "20"))            # retries allowed per run, all calls
+PAGE_SIZE = int(os.getenv("ODOO_PAGE_SIZE", "2000"))              # rows per web_search_read page
+FETCH_WORKERS = int(os.getenv("ODOO_FETCH_WORKERS", "4"))          # parallel page requests per fetch
+COMPANY_WORKERS = int(os.getenv("ODOO_COMPANY_WORKERS", "2"))      # companies processed at once
+SWITCH_COMPANY = os.getenv("ODOO_SWITCH_COMPANY", "0") == "1"      # legacy: write res.users.company_id per company
+SESSION_CACHE = os.getenv("ODOO_SESSION_CACHE", ".odoo_session.json")  # "" disables the session cache
+WIZARD_CACHE = os.getenv("ODOO_WIZARD_CACHE", ".odoo_wizards.json")
+WIZARD_TTL = float(os.getenv("ODOO_WIZARD_TTL", "1800"))          # seconds a computed wizard stays reusable; 0 disables
+
+SESSION_EXPIRED = "odoo.http.SessionExpiredException"
+
+# Odoo errors (exception name or message fragment) that succeed when simply replayed
+TRANSIENT_ODOO_ERRORS = {
+    "SerializationFailure": "serialization",
+    "could not serialize access": "serialization",
+    "TransactionRollbackError": "serialization",
+    "DeadlockDetected": "deadlock",
+    "deadlock detected": "deadlock",
+    "LockNotAvailable": "lock",
+    "could not obtain lock": "lock",
+    "psycopg2.OperationalError": "db_connection",
+    "server closed the connection unexpectedly": "db_connection",
+}
+TRANSIENT_HTTP_STATUS = {429, 500, 502, 503, 504}
+
+# Methods that create records: replaying one that may have reached Odoo would create a duplicate
+NON_IDEMPOTENT_METHODS = {"create", "web_save", "copy"}
+
+
+# ========= ERRORS ==========
+class OdooRPCError(Exception):
+    """Error returned by Odoo inside a JSON-RPC response (HTTP 200 with an "error" key)."""
+
+    def __init__(self, error):
+        self.error = error
+        data = error.get("data") or {}
+        self.name = data.get("name", "")
+        self.message = data.get("message") or error.get("message", "")
+        super().__init__(f"{self.name or 'Odoo error'}: {self.message}")
+
+
+# ========= RETRY POLICY ==========
+def classify_error(e):
+    """Short reason string when `e` is worth retrying, None when it is permanent."""
+    if isinstance(e, OdooRPCError):
+        text = f"{e.name} {e.message}"
+        for marker, reason in TRANSIENT_ODOO_ERRORS.items():
+            if marker in text:
+                return reason
+        return None
+    if isinstance(e, HTTPError):
+        status = e.response.status_code if e.response is not None else None
+        return f"http_{status}" if status in TRANSIENT_HTTP_STATUS else None
+    if isinstance(e, Timeout):
+        return "timeout"
+    if isinstance(e, ConnectionError):
+        return "connection"
+    if isinstance(e, (RequestException, ValueError)):
+        return "bad_response"
+    return None
+
+
+def classify_unsafe_error(e):
+    """
+    classify_error for calls that must not run twice (creates, computes): only errors proving
+    the request never reached Odoo, or that Odoo rolled it back, are retried. A gateway 5xx, a
+    dropped connection, a read timeout or an unreadable response may follow a call Odoo
+    still carries out, so they are final.
+    """
+    if isinstance(e, OdooRPCError):
+        return classify_error(e)
+    if isinstance(e, ConnectTimeout):
+        return "connect_timeout"
+    if isinstance(e, ConnectionError) and e.args and isinstance(getattr(e.args[0], "reason", None), NewConnectionError):
+        return "connection_refused"
+    return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter for transient failures, bounded per call by
+    `max_retries` attempts and per run by a shared retry `budget`. `classify` tells
+    transient errors (a reason string) from permanent ones (None).
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, backoff=RETRY_BACKOFF,
+                 cap=RETRY_BACKOFF_CAP, budget=RETRY_BUDGET, classify=classify_error):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cap = cap
+        self.budget = budget
+        self.classify = classify
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def delay(self, attempt):
+        """Equal-jitter backoff: half the exponential step fixed, half random."""
+        step = min(self.cap, self.backoff * 2 ** (attempt - 1))
+        return step / 2 + random.uniform(0, step / 2)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _spend(self):
+        with self._lock:
+            if self.stats["retries"] >= self.budget:
+                self.stats["budget_exhausted"] += 1
+                return False
+            self.stats["retries"] += 1
+            return True
+
+    def run(self, fn, label="", classify=None):
+        """
+        Call fn() until it succeeds, a permanent error is raised, or attempts/budget run out.
+        `classify` overrides the policy's classifier for this call.
+        """
+        classify = classify or self.classify
+        for attempt in range(1, self.max_retries + 1):
+            self._count("attempts")
+            try:
+                return fn()
+            except Exception as e:
+                reason = classify(e)
+                if reason is None:
+                    self._count("permanent_errors")
+                    raise
+                self._count(f"transient:{reason}")
+                log.warning(f"⚠️ {label} attempt {attempt} failed ({reason}): {e}")
+                if attempt == self.max_retries:
+                    log.error(f"❌ {label} failed after {attempt} attempts.")
+                    raise
+                if not self._spend():
+                    log.error(f"❌ Retry budget of {self.budget} used up — not retrying {label}.")
+                    raise
+                wait = self.delay(attempt)
+                self._count("backoff_seconds", wait)
+                log.info(f"⏳ Retrying in {wait:.1f} seconds...")
+                time.sleep(wait)
+
+    def summary(self):
+        stats = dict(self.stats)
+        if "backoff_seconds" in stats:
+            stats["backoff_seconds"] = round(stats["backoff_seconds"], 1)
+        return stats
+
+
+RETRY_POLICY = RetryPolicy()
+
+
+@atexit.register
+def _log_retry_stats():
+    if RETRY_POLICY.stats["retries"] or RETRY_POLICY.stats["permanent_errors"]:
+        log.info(f"📈 Odoo retry stats: {RETRY_POLICY.summary()}")
+
+
+# ========= WIZARD CACHE ==========
+class WizardCache:
+    """
+    Remembers the last computed report wizard per (server, user, model, result model),
+    persisted to `path` so consecutive scripts of one cron slot can share it.
+    A later compute for the same slot replaces the entry whatever its company, since it
+    rewrites the same result rows.
+    """
+
+    def __init__(self, path=WIZARD_CACHE, ttl=WIZARD_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp, self.path)
+
+    def get(self, key, params):
+        if not self.path or self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._load().get(key)
+        if not entry or entry["params"] != params:
+            return None
+        if time.time() - entry["computed_at"] > self.ttl:
+            return None
+        return entry["wizard_id"]
+
+    def put(self, key, params, wizard_id):
+        if not self.path or self.ttl <= 0:
+            return
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            entries = {k: v for k, v in entries.items() if now - v["computed_at"] <= self.ttl}
+            entries[key] = {"params": params, "wizard_id": wizard_id, "computed_at": now}
+            self._write(entries)
+
+
+# ========= PAGING ==========
+def page_order(order=None):
+    """
+    `order` made total by a trailing id (just "id" by default): every offset page is its own
+    query, so a non-unique sort would let pages overlap or skip rows.
+    """
+    if not order:
+        return "id"
+    fields = [part.split()[0] for part in order.split(",") if part.strip()]
+    return order if "id" in fields else f"{order}, id"
+
+
+# ========= CLIENT ==========
+class OdooClient:
+    """JSON-RPC client sharing one authenticated, pooled keep-alive session."""
+
+    def __init__(self, url=None, db=None, username=None, password=None,
+                 timeout=READ_TIMEOUT, pool_size=POOL_SIZE, retry_policy=None, cassette=None):
+        self.url = (url or ODOO_URL or "").rstrip("/")
+        self.db = db or DB
+        self.username = username or USERNAME
+        self.password = password or PASSWORD
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RETRY_POLICY
+        self.wizards = WizardCache()
+        self.cassette = cassette or get_cassette()
+        self.uid = None
+        self._login_lock = threading.Lock()
+        self._result_locks = {}
+        self._result_locks_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # ---- low level ----
+    def rpc(self, path, params, timeout=None, reauth=True, idempotent=True):
+        """
+        POST a JSON-RPC call and return its "result", raising OdooRPCError on an Odoo error.
+        An expired session triggers one fresh login and a replay of the call. `timeout` 0
+        waits for the response indefinitely; a non-`idempotent` call is only retried when it
+        never reached Odoo or Odoo rolled it back (classify_unsafe_error).
+        """
+        taped = self.cassette is not None and path not in SESSION_PATHS
+        if taped and self.cassette.replaying:
+            entry = self.cassette.play(path, params)
+            if entry.get("error"):
+                raise OdooRPCError(entry["error"])
+            return entry["result"]
+
+        payload = {"jsonrpc": "2.0", "method": "call", "params": params}
+        read_timeout = self.timeout if timeout is None else (timeout or None)
+        session_id = self.session.cookies.get("session_id")
+
+        def attempt():
+            r = self.session.post(
+                f"{self.url}{path}",
+                json=payload,
+                timeout=(CONNECT_TIMEOUT, read_timeout),
+            )
+            r.raise_for_status()
+            data = json_loads(r.content)
+            if "error" in data:
+                raise OdooRPCError(data["error"])
+            return data.get("result")
+
+        try:
+            result = self.retry_policy.run(
+                attempt, label=path, classify=None if idempotent else classify_unsafe_error,
+            )
+        except OdooRPCError as error:
+            if not (reauth and error.name == SESSION_EXPIRED and self.uid is not None):
+                if taped:
+                    self.cassette.record(path, params, error=error.error)
+                raise
+        else:
+            if taped:
+                self.cassette.record(path, params, result=result)
+            return result
+        log.warning("🔑 Odoo session expired — logging in again")
+        with self._login_lock:
+            # Another thread may already have renewed the session while we waited
+            if self.session.cookies.get("session_id") == session_id:
+                self.login(force=True)
+        return self.rpc(path, params, timeout=timeout, reauth=False, idempotent=idempotent)
+
+    def call_kw(self, model, method, args=None, kwargs=None, timeout=None):
+        params = {"model": model, "method": method, "args": args or [], "kwargs": kwargs or {}}
+        return self.rpc(
+            f"/web/dataset/call_kw/{model}/{method}", params, timeout=timeout,
+            idempotent=method not in NON_IDEMPOTENT_METHODS,
+        )
+
+    def call_button(self, model, method, args=None, kwargs=None, timeout=COMPUTE_TIMEOUT):
+        """Button action such as a report wizard's compute: long running and never replayed on a timeout."""
+        params = {"model": model, "method": method, "args": args or [], "kwargs": kwargs or {}}
+        return self.rpc("/web/dataset/call_button", params, timeout=timeout, idempotent=False)
+
+    def search_read_page(self, model, specification, domain=None, context=None,
+                         offset=0, limit=PAGE_SIZE, order=None):
+        """Single web_search_read call, returning {"length": ..., "records": [...]}."""
+        kwargs = {
+            "specification": specification,
+            "domain": domain or [],
+            "offset": offset,
+            "limit": limit,
+            "context": context or {},
+        }
+        if order:
+            kwargs["order"] = order
+        return self.call_kw(model, "web_search_read", kwargs=kwargs) or {}
+
+    def iter_search_read(self, model, specification, domain=None, context=None,
+                         page_size=PAGE_SIZE, order=None, workers=1):
+        """
+        Yield web_search_read record batches of up to `page_size` rows.
+        Walks offsets using the `length` Odoo reports, so no row cap applies; every page
+        is sorted by page_order(order). With `workers` > 1 the remaining offset windows
+        are fetched concurrently on the shared session and still yielded in offset order.
+        """
+        order = page_order(order)
+        first = self.search_read_page(model, specification, domain, context, 0, page_size, order)
+        records = first.get("records", [])
+        if not records:
+            return
+        total = first.get("length", len(records))
+        offset = len(records)
+        log.info(f"📥 {model}: {offset}/{total} rows")
+        yield records
+
+        if workers > 1 and offset < total:
+            offsets = range(offset, total, page_size)
+            log.info(f"🧵 {model}: fetching {len(offsets)} more pages on {workers} workers")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(self.search_read_page, model, specification, domain, context, o, page_size, order)
+                    for o in offsets
+                ]
+                for future in futures:
+                    records = future.result().get("records", [])
+                    offset += len(records)
+                    log.info(f"📥 {model}: {offset}/{total} rows")
+                    yield records
+            return
+
+        while offset < total:
+            records = self.search_read_page(model, specification, domain, context, offset, page_size, order).get("records", [])
+            if not records:
+                break
+            offset += len(records)
+            log.info(f"📥 {model}: {offset}/{total} rows")
+            yield records
+
+    def cached_wizard(self, model, company_id, params, result_model, build):
+        """
+        Id of a `model` wizard computed with `params` for `company_id`, reusing one computed
+        within ODOO_WIZARD_TTL seconds if it is still the last compute on `result_model`. `build()` creates and computes a new wizard and returns
+        its id, or None when the compute failed (nothing is cached then).
+        """
+        key = f"{self.url}|{self.db}|{self.uid}|{model}|{result_model}"
+        params = json.loads(json.dumps({**params, "company_id": company_id}, sort_keys=True, default=str))
+        if self.cassette:
+            # Recorded runs must contain the wizard calls themselves
+            return build()
+        wiz_id = self.wizards.get(key, params)
+        if wiz_id:
+            log.info(f"♻️ Reusing computed {model} wizard {wiz_id} (company {company_id})")
+            return wiz_id
+        wiz_id = build()
+        if wiz_id:
+            self.wizards.put(key, params, wiz_id)
+        return wiz_id
+
+    def result_lock(self, result_model):
+        """
+        Lock to hold around a report wizard's compute and the fetch of its rows: a compute
+        rewrites the user's rows of `result_model` whatever the company, so companies
+        processed in parallel must take turns on it.
+        """
+        with self._result_locks_lock:
+            return self._result_locks.setdefault(result_model, threading.Lock())
+
+    def context(self, company_id=None, **extra):
+        """Standard request context, scoped to `company_id` when given."""
+        ctx = {"lang": "en_US", "tz": "Asia/Dhaka", "uid": self.uid}
+        if company_id is not None:
+            ctx["allowed_company_ids"] = [company_id]
+            ctx["company_id"] = company_id
+        ctx.update(extra)
+        return ctx
+
+    # ---- session ----
+    def login(self, force=False):
+        """Authenticate, reusing a still-valid cached session unless `force` is set."""
+        if self.cassette and self.cassette.replaying:
+            self.uid = self.cassette.load_session()["uid"]
+            log.info(f"📼 Replaying recorded session (uid={self.uid})")
+            return {"uid": self.uid}
+        if not force:
+            info = self._resume_session()
+            if info:
+                if self.cassette:
+                    self.cassette.save_session(self.uid)
+                return info
+
+        self.session.cookies.clear()
+        result = self.rpc(
+            "/web/session/authenticate",
+            {"db": self.db, "login": self.username, "password": self.password},
+            reauth=False,
+        )
+        if result and "uid" in result:
+            self.uid = result["uid"]
+            log.info(f"✅ Logged in (uid={self.uid})")
+            self._save_session()
+            if self.cassette:
+                self.cassette.save_session(self.uid)
+            return result
+        raise Exception("❌ Login failed")
+
+    def _resume_session(self):
+        """Load the cached session cookie and return its session info if Odoo still accepts it."""
+        if not SESSION_CACHE or not os.path.exists(SESSION_CACHE):
+            return None
+        try:
+            with open(SESSION_CACHE) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (cached.get("url"), cached.get("db"), cached.get("login")) != (self.url, self.db, self.username):
+            return None
+
+        self.session.cookies.set("session_id", cached["session_id"])
+        try:
+            info = self.rpc("/web/session/get_session_info", {}, reauth=False)
+        except (OdooRPCError, RequestException, ValueError):
+            info = None
+        if not info or info.get("uid") != cached.get("uid"):
+            self.session.cookies.clear()
+            log.info("🔑 Cached Odoo session is no longer valid")
+            return None
+
+        self.uid = info["uid"]
+        log.info(f"♻️ Reused cached session (uid={self.uid})")
+        return info
+
+    def _save_session(self):
+        if not SESSION_CACHE:
+            return
+        session_id = self.session.cookies.get("session_id")
+        if not session_id:
+            return
+        cached = {
+            "url": self.url,
+            "db": self.db,
+            "login": self.username,
+            "uid": self.uid,
+            "session_id": session_id,
+            "saved_at": time.time(),
+        }
+        # Owner read/write only: the file holds a live session token
+        fd = os.open(SESSION_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(cached, f)
+        os.chmod(SESSION_CACHE, 0o600)
+
+    def switch_company(self, company_id):
+        if self.uid is None:
+            raise Exception("User not logged in yet")
+        try:
+            self.call_kw(
+                "res.users", "write",
+                args=[[self.uid], {"company_id": company_id}],
+                kwargs={"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
+            )
+        except OdooRPCError as e:
+            log.error(f"❌ Failed to switch company {company_id}: {e.error}")
+            return False
+        log.info(f"🔄 Session switched to company {company_id}")
+        return True
+
+    def for_each_company(self, companies, fn, workers=COMPANY_WORKERS):
+        """
+        Run fn(company_id, cname) for every entry in `companies` and return {company_id: result}.
+        Every call already scopes itself through allowed_company_ids/company_id in its context,
+        so companies run in parallel without touching res.users. Set ODOO_SWITCH_COMPANY=1 to
+        fall back to the sequential switch_company() flow.
+        """
+        results = {}
+        if SWITCH_COMPANY or workers <= 1:
+            for cid, cname in companies.items():
+                if SWITCH_COMPANY and not self.switch_company(int(cid)):
+                    log.error(f"❌ Skipping {cname} — company switch failed")
+                    continue
+                results[cid] = fn(cid, cname)
+            return results
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {cid: pool.submit(fn, cid, cname) for cid, cname in companies.items()}
+            for cid, future in futures.items():
+                try:
+                    results[cid] = future.result()
+                except Exception as e:
+                    log.error(f"❌ {companies[cid]} failed: {e}")
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        return results
+
+
+_client = None
+
+
+def get_client():
+    """Process-wide shared client, so every report reuses one pool and one login."""
+    global _client
+    if _client is None:
+        _client = OdooClient()
+    return _client
@@ -0,0 +1,267 @@
+"""
+stock.opening.closing report definitions: each report names the wizard dates it needs and
+the sinks (Excel file, Google worksheet per company) it writes. Reports sharing the same
+wizard dates are computed and fetched once per company and fanned out to all their sinks.
+
+    python opening_closing.py                    # every report
+    python opening_closing.py rm_rejection       # a subset
+"""
+import logging
+import os
+import sys
+from datetime import date, datetime
+
+from dotenv import load_dotenv
+
+from odoo_client import get_client, FETCH_WORKERS
+from ingest import fetch_frame, apply_schema, export_view, OPENING_CLOSING_SCHEMA
+from sheets import get_sheets, paste_frame
+from outputs import save_frame
+from snapshots import append_snapshot
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+COMPANIES = {
+    1: "Zipper",
+    3: "Metal Trims",
+}
+
+TO_DATE = date.today().strftime("%Y-%m-%d")
+DOWNLOAD_DIR = os.path.join(os.getcwd(), "download")
+
+# ========= FIELDS ==========
+SPECIFICATION = {
+    "parent_category": {"fields": {"display_name": {}}},    # Product
+    "product_category": {"fields": {"display_name": {}}},   # Category
+    "classification_id": {"fields": {"display_name": {}}},  # Classification
+    "product_id": {"fields": {"display_name": {}}},         # Item
+    "pr_code": {},                                          # Item Code
+    "lot_id": {"fields": {"display_name": {}}},             # Invoice
+    "receive_date": {},                                     # Receive Date
+    "pur_price": {},                                        # Pur Price
+    "landed_cost": {},                                      # Landed Cost
+    "lot_price": {},                                        # Price
+    "product_uom": {"fields": {"display_name": {}}},        # Unit
+    "opening_qty": {},                                      # Opening Quantity
+    "opening_value": {},                                    # Opening Value
+    "receive_qty": {},                                      # Receive Quantity
+    "receive_value": {},                                    # Receive Value
+    "issue_qty": {},                                        # Issue Quantity
+    "issue_value": {},                                      # Issue Value
+    "cloing_qty": {},                                       # Closing Quantity
+    "cloing_value": {},                                     # Closing Value
+    "po_type": {},                                          # Po Type
+    "rejected": {},                                         # Rejected
+    "shipment_mode": {},                                    # Shipment Mode
+    "partner_id": {"fields": {"display_name": {}}},         # Vendor
+    "po_number": {},                                        # PO
+    "product_type": {"fields": {"display_name": {}}},       # Product Type
+    "item_category": {"fields": {"display_name": {}}},      # Item Type
+}
+
+FIELD_LABELS = {
+    "parent_category": "Product",
+    "product_category": "Category",
+    "classification_id": "Classification",
+    "product_id": "Item",
+    "pr_code": "Item Code",
+    "lot_id": "Invoice",
+    "receive_date": "Receive Date",
+    "pur_price": "Pur Price",
+    "landed_cost": "Landed Cost",
+    "lot_price": "Price",
+    "product_uom": "Unit",
+    "opening_qty": "Opening Quantity",
+    "opening_value": "Opening Value",
+    "receive_qty": "Receive Quantity",
+    "receive_value": "Receive Value",
+    "issue_qty": "Issue Quantity",
+    "issue_value": "Issue Value",
+    "cloing_qty": "Closing Quantity",
+    "cloing_value": "Closing Value",
+    "po_type": "Po Type",
+    "rejected": "Rejected",
+    "shipment_mode": "Shipment Mode",
+    "partner_id": "Vendor",
+    "po_number": "PO",
+    "product_type": "Product Type",
+    "item_category": "Item Type",
+}
+
+# ========= REPORTS ==========
+REPORTS = {
+    # Mt_Zip_db.py: this month's stock register
+    "stock_register": {
+        "from_date": date.today().replace(day=1).strftime("%Y-%m-%d"),
+        "columns": [
+            "Category", "Classification", "Closing Quantity", "Closing Value", "Invoice",
+            "Issue Quantity", "Issue Value", "Item", "Item Code", "Landed Cost",
+            "Opening Quantity", "Opening Value", "Po Type", "Price", "Product", "Pur Price",
+            "Receive Date", "Receive Quantity", "Receive Value", "Rejected", "Shipment Mode",
+            "Unit", "Vendor", "PO", "Product Type", "Item Type",
+        ],
+        "excel": "{company}_opening_closing_{to_date}.xlsx",
+        "sheet_key": "1j37Y6g3pnMWtwe2fjTe1JTT32aRLS0Z1YPjl3v657Cc",
+        "worksheets": {1: "Current Stock report", 3: "Current Stock - MT"},
+    },
+    # rm_rejection.py: vendor-wise rejection since the start of 2025
+    "rm_rejection": {
+        "from_date": "2025-01-01",
+        "columns": list(FIELD_LABELS.values()),
+        "excel": "{company}_rm_rejection_{to_date}.xlsx",
+        "sheet_key": "1xsFwoyqCFOGkMDmTDaXqgxXVhaXAeU0X61YcAgaVrtc",
+        "worksheets": {1: "Zip_Vendor_wise_Rejection_RAW", 3: "MT_Vendor_wise_Rejection_RAW"},
+    },
+}
+
+
+# ========= CREATE FORECAST WIZARD ==========
+def create_forecast_wizard(client, company_id, from_date, to_date):
+    wiz_id = client.call_kw(
+        "stock.forecast.report", "create",
+        args=[{"from_date": from_date, "to_date": to_date}],
+        kwargs={"context": {"allowed_company_ids": [company_id], "company_id": company_id}},
+    )
+    log.info(f"🪄 Created wizard {wiz_id} for company {company_id}")
+    return wiz_id
+
+
+# ========= COMPUTE FORECAST ==========
+def compute_forecast(client, company_id, wizard_id):
+    result = client.call_button(
+        "stock.forecast.report", "print_date_wise_stock_register",
+        args=[[wizard_id]],
+        kwargs={"context": client.context(company_id)},
+    )
+    log.info(f"⚡ Forecast computed for wizard {wizard_id} (company {company_id})")
+    return result
+
+
+# ========= COMPUTED FORECAST WIZARD ==========
+def prepare_forecast_wizard(client, company_id, from_date, to_date):
+    """Forecast wizard computed for the company, reused when another report already computed the same one."""
+    def build():
+        wiz_id = create_forecast_wizard(client, company_id, from_date, to_date)
+        compute_forecast(client, company_id, wiz_id)
+        return wiz_id
+
+    return client.cached_wizard(
+        "stock.forecast.report", company_id,
+        {"from_date": from_date, "to_date": to_date},
+        "stock.opening.closing", build,
+    )
+
+
+# ========= FETCH OPENING/CLOSING WITH LABELS ==========
+def fetch_opening_closing(client, company_id, cname):
+    import pandas as pd
+
+    context = {"allowed_company_ids": [company_id], "company_id": company_id}
+    try:
+        # Page through the report straight into column buffers (nested dicts → display_name)
+        df = fetch_frame(
+            client,
+            "stock.opening.closing",
+            SPECIFICATION,
+            domain=[["product_id.categ_id.complete_name", "ilike", "All / RM"]],
+            context={
+                **context,
+                "active_model": "stock.forecast.report",
+                "active_id": 0,
+                "active_ids": [0],
+            },
+            workers=FETCH_WORKERS,
+        )
+
+        # Drop unwanted 'id' column if exists
+        if "id" in df.columns:
+            df.drop(columns=["id"], inplace=True)
+
+        df.rename(columns=FIELD_LABELS, inplace=True)
+        apply_schema(df, OPENING_CLOSING_SCHEMA)
+
+        log.info(f"📊 {cname}: {len(df)} rows fetched with labels")
+        return df
+
+    except Exception as e:
+        log.error(f"❌ {cname}: Failed to fetch report | Error: {e}")
+        return pd.DataFrame()
+
+
+# ========= PASTE TO GOOGLE SHEETS ==========
+def paste_to_google_sheet(df, sheet_key, worksheet_name):
+    if df.empty:
+        log.warning("DataFrame empty. Skipping Google Sheet update.")
+        return
+
+    worksheet = get_sheets().worksheet(sheet_key, worksheet_name)
+
+    import pytz
+
+    # Paste data over columns A → Z only
+    paste_frame(worksheet, export_view(df), clear_range="A:Z")
+
+    tz = pytz.timezone("Asia/Dhaka")
+    timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
+    log.info(f"✅ Data pasted to {worksheet_name} & timestamp updated: {timestamp}")
+
+
+# ========= SINKS ==========
+def write_report(df, name, cid, cname):
+    """Excel file and worksheet of one report, in that report's column order."""
+    report = REPORTS[name]
+    df = df[report["columns"]]
+
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    company = cname.lower().replace(" ", "")
+    local_file = os.path.join(DOWNLOAD_DIR, report["excel"].format(company=company, to_date=TO_DATE))
+    for path in save_frame(df, local_file):
+        log.info(f"📂 Saved locally: {path}")
+    append_snapshot(df, name, cname, TO_DATE)
+
+    worksheet_name = report["worksheets"].get(cid, cname)
+    paste_to_google_sheet(df, sheet_key=report["sheet_key"], worksheet_name=worksheet_name)
+
+
+# ========= PROCESS COMPANY ==========
+def process_company(client, cid, cname, names):
+    """Compute and fetch once per distinct wizard date range, then write every report on it."""
+    groups = {}
+    for name in names:
+        groups.setdefault(REPORTS[name]["from_date"], []).append(name)
+
+    failed = []
+    for from_date, group in groups.items():
+        # The compute rewrites stock.opening.closing for every company: one company at a time
+        with client.result_lock("stock.opening.closing"):
+            prepare_forecast_wizard(client, cid, from_date, TO_DATE)
+            df = fetch_opening_closing(client, cid, cname)
+        if df.empty:
+            continue
+        for name in group:
+            try:
+                write_report(df, name, cid, cname)
+            except Exception as e:
+                log.error(f"❌ {cname}: {name} output failed: {e}")
+                failed.append(name)
+    if failed:
+        raise RuntimeError(f"{cname}: outputs failed for {', '.join(failed)}")
+
+
+# ========= MAIN SYNC ==========
+def run(names=None):
+    names = list(names or REPORTS)
+    unknown = [n for n in names if n not in REPORTS]
+    if unknown:
+        raise SystemExit(f"Unknown report(s): {', '.join(unknown)} (choose from {', '.join(REPORTS)})")
+
+    client = get_client()
+    client.login()
+    client.for_each_company(COMPANIES, lambda cid, cname: process_company(client, cid, cname, names))
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    run(sys.argv[1:])
@@ -0,0 +1,91 @@
+import importlib.util
+import logging
+import os
+
+from ingest import export_view
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+# Local files written per report frame: xlsx for people, parquet / feather / csv.gz for scripts and archives
+OUTPUT_FORMATS = [f.strip() for f in os.getenv("OUTPUT_FORMATS", "xlsx").split(",") if f.strip()]
+XLSX_WRITER = os.getenv("XLSX_WRITER", "pandas")  # "stream": openpyxl write-only rows, constant memory
+XLSX_CHUNK_ROWS = int(os.getenv("XLSX_CHUNK_ROWS", "5000"))  # rows converted at once by the stream writer
+
+# Optional: Parquet and Feather need pyarrow (checked without importing it)
+HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+EXTENSIONS = {"xlsx": ".xlsx", "parquet": ".parquet", "feather": ".feather", "csv.gz": ".csv.gz"}
+
+
+# ========= WRITERS ==========
+def write_xlsx(df, path):
+    """Excel file of `df` with its dates as YYYY-MM-DD text, like the Sheets paste."""
+    if XLSX_WRITER not in ("pandas", "stream"):
+        raise ValueError(f"Unknown XLSX_WRITER {XLSX_WRITER!r} (choose from pandas, stream)")
+    df = export_view(df)
+    if XLSX_WRITER == "pandas":
+        df.to_excel(path, index=False)
+        return
+
+    from openpyxl import Workbook
+
+    # Write-only workbook: rows are streamed to the file instead of kept as cell objects,
+    # and only one chunk of rows at a time is converted to Python values
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append([str(c) for c in df.columns])
+    for start in range(0, len(df), XLSX_CHUNK_ROWS):
+        chunk = df.iloc[start:start + XLSX_CHUNK_ROWS]
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(path)
+
+
+def arrow_view(df):
+    """
+    Frame Arrow can store: a text column holding Odoo's False for empty values (strings and
+    booleans mixed, which Arrow rejects) gets None there instead.
+    """
+    view = {}
+    for c in df.select_dtypes(include="object").columns:
+        kinds = df[c].map(type)
+        if (kinds == str).any() and (kinds == bool).any():
+            view[c] = df[c].where(kinds != bool, None)
+    return df.assign(**view) if view else df
+
+
+def write_parquet(df, path):
+    arrow_view(df).to_parquet(path, index=False)
+
+
+def write_feather(df, path):
+    arrow_view(df).reset_index(drop=True).to_feather(path)
+
+
+def write_csv_gz(df, path):
+    # Level 1: most of the size reduction for a fraction of the default level's time
+    df.to_csv(path, index=False, compression={"method": "gzip", "compresslevel": 1})
+
+
+WRITERS = {"xlsx": write_xlsx, "parquet": write_parquet, "feather": write_feather, "csv.gz": write_csv_gz}
+
+
+# ========= SAVE ==========
+def save_frame(df, path, formats=None):
+    """
+    Write `df` as `path` (an .xlsx name) in every format of `formats` (default OUTPUT_FORMATS);
+    other formats go next to it under the same name. Returns the paths written.
+    """
+    base = path[:-len(".xlsx")] if path.endswith(".xlsx") else path
+    written = []
+    for fmt in formats or OUTPUT_FORMATS:
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown output format {fmt!r} (choose from {', '.join(WRITERS)})")
+        if fmt in ("parquet", "feather") and not HAS_ARROW:
+            log.warning(f"⚠️ pyarrow not installed. Skipping {fmt} output of {os.path.basename(base)}.")
+            continue
+        target = base + EXTENSIONS[fmt]
+        WRITERS[fmt](df, target)
+        written.append(target)
+    return written
@@ -1,16 +1,10 @@
-import requests
-import json
-import time
 import logging
 import sys
-import os
 from datetime import date, datetime
-import gspread
-from google.oauth2 import service_account
-import pandas as pd
-import pytz
 from dotenv import load_dotenv
-from requests.exceptions import RequestException
+from odoo_client import get_client
+from sheets import get_sheets, paste_rows
+from snapshots import append_snapshot, table_frame
 
 load_dotenv()
 logging.basicConfig(
@@ -21,11 +15,6 @@ logging.basicConfig(
 log = logging.getLogger()
 
 # ========= CONFIG ==========
-ODOO_URL = os.getenv("ODOO_URL")
-DB = os.getenv("ODOO_DB")
-USERNAME = os.getenv("ODOO_USERNAME")
-PASSWORD = os.getenv("ODOO_PASSWORD")
-
 COMPANIES = {
     1: "Zipper",
     3: "Metal Trims",
@@ -42,8 +31,7 @@ WORKSHEET_MAP = {
 }
 
 today = date.today()
-session = requests.Session()
-USER_ID = None
+client = get_client()
 
 # ========= FISCAL YEAR HELPER ==========
 def get_fiscal_year_str(ref_date=None):
@@ -58,71 +46,6 @@ def get_fiscal_year_str(ref_date=None):
     fy_end_year = fy_start_year + 1
     return f"{fy_start_year}-{str(fy_end_year)[2:]}"
 
-# ========= RETRY WRAPPER ==========
-def retry_request(method, url, max_retries=3, backoff=3, **kwargs):
-    for attempt in range(1, max_retries + 1):
-        try:
-            r = method(url, **kwargs)
-            r.raise_for_status()
-            return r
-        except RequestException as e:
-            log.warning(f"⚠️  Attempt {attempt} failed: {e}")
-            if attempt < max_retries:
-                log.info(f"⏳ Retrying in {backoff}s...")
-                time.sleep(backoff)
-            else:
-                log.error("❌ All retry attempts failed.")
-                raise
-
-# ========= LOGIN ==========
-def login():
-    global USER_ID
-    payload = {
-        "jsonrpc": "2.0",
-        "params": {"db": DB, "login": USERNAME, "password": PASSWORD},
-    }
-    r = retry_request(
-        session.post,
-        f"{ODOO_URL}/web/session/authenticate",
-        json=payload,
-    )
-    result = r.json().get("result")
-    if result and "uid" in result:
-        USER_ID = result["uid"]
-        log.info(f"✅ Logged in (uid={USER_ID})")
-        return result
-    raise Exception("❌ Login failed")
-
-# ========= SWITCH COMPANY ==========
-def switch_company(company_id):
-    if USER_ID is None:
-        raise Exception("User not logged in yet")
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "res.users",
-            "method": "write",
-            "args": [[USER_ID], {"company_id": company_id}],
-            "kwargs": {
-                "context": {
-                    "allowed_company_ids": [company_id],
-                    "company_id": company_id,
-                }
-            },
-        },
-    }
-    r = retry_request(
-        session.post,
-        f"{ODOO_URL}/web/dataset/call_kw",
-        json=payload,
-    )
-    if "error" in r.json():
-        log.error(f"❌ Failed to switch company {company_id}: {r.json()['error']}")
-        return False
-    log.info(f"🔄 Session switched to company {company_id}")
-    return True
-
 # ========= FETCH AGEING DATA ==========
 def fetch_ageing_data(company_id, cname):
     """Fetches ageing summary report filtered by:
@@ -132,29 +55,18 @@ def fetch_ageing_data(company_id, cname):
       - Fiscal Year: current FY    (e.g. "2025-26")
     """
     fiscal_year = get_fiscal_year_str()
-    payload = {
-        "jsonrpc": "2.0",
-        "method": "call",
-        "params": {
-            "model": "rm.ageing.summary.report",
-            "method": "retrive_ageing_by_item_cat_data",
-            "args": [str(company_id), AGEING_SLOT, DISPLAY_TYPE, fiscal_year],
-            "kwargs": {
-                "context": {
-                    "lang": "en_US",
-                    "tz": "Asia/Dhaka",
-                    "uid": USER_ID,
-                    "allowed_company_ids": list(COMPANIES.keys()),
-                }
-            },
+    result = client.call_kw(
+        "rm.ageing.summary.report", "retrive_ageing_by_item_cat_data",
+        args=[str(company_id), AGEING_SLOT, DISPLAY_TYPE, fiscal_year],
+        kwargs={
+            "context": {
+                "lang": "en_US",
+                "tz": "Asia/Dhaka",
+                "uid": client.uid,
+                "allowed_company_ids": list(COMPANIES.keys()),
+            }
         },
-    }
-    r = retry_request(
-        session.post,
-        f"{ODOO_URL}/web/dataset/call_kw/rm.ageing.summary.report/retrive_ageing_by_item_cat_data",
-        json=payload,
-    )
-    result = r.json().get("result", {})
+    ) or {}
     if not result.get("success"):
         log.warning(f"⚠️  {cname}: API returned no data — {result.get('message', 'unknown')}")
         return {}
@@ -217,67 +129,56 @@ def paste_to_sheet(header1, header2, data_rows, worksheet_name, cname):
         log.warning(f"⚠️  {cname}: No data rows. Skipping {worksheet_name}.")
         return
 
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = service_account.Credentials.from_service_account_file(
-        "service_account.json", scopes=scope
-    )
-    client = gspread.authorize(creds)
-    sheet = client.open_by_key(SHEET_KEY)
-    worksheet = sheet.worksheet(worksheet_name)
+    worksheet = get_sheets().worksheet(SHEET_KEY, worksheet_name)
 
-    # Row 1 is a custom user title — write starting from row 2
-    # Write month labels to row 2
-    worksheet.update("A2", [header1], value_input_option="RAW")
-    # Write Value/Qty sub-headers to row 3
-    worksheet.update("A3", [header2], value_input_option="RAW")
-    # Write data rows starting from row 4
-    if data_rows:
-        worksheet.update("A4", data_rows, value_input_option="USER_ENTERED")
+    import pytz
+
+    # Row 1 is a custom user title — month labels go to row 2, Value/Qty sub-headers
+    # to row 3 and data rows from row 4
+    paste_rows(worksheet, [header1, header2], data_rows, first_row=2)
 
     tz = pytz.timezone("Asia/Dhaka")
     timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
     log.info(f"✅ '{worksheet_name}' updated at {timestamp}")
 
-# ========= MAIN ==========
-if __name__ == "__main__":
-    login()
-
-    for cid, cname in COMPANIES.items():
-        log.info(f"\n{'='*55}")
-        log.info(f"🏭 Processing: {cname} (company_id={cid})")
-
-        if not switch_company(cid):
-            log.error(f"❌ Skipping {cname} — company switch failed")
-            continue
+# ========= WRITE OUTPUTS ==========
+def write_outputs(header1, header2, data_rows, cid, cname):
+    if data_rows:
+        # Save locally to Excel (timestamp with seconds avoids file-lock conflicts)
+        ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+        output_file = f"{cname.lower().replace(' ', '_')}_products_{ts}.xlsx"
+        from openpyxl import Workbook
+        wb = Workbook()
+        ws = wb.active
+        ws.append(header1)
+        ws.append(header2)
+        for row in data_rows:
+            ws.append(row)
+        wb.save(output_file)
+        log.info(f"[SAVED] {output_file}  ({len(data_rows)} rows)")
+        append_snapshot(table_frame(header1, header2, data_rows), "products_180", cname)
+
+        worksheet_name = WORKSHEET_MAP[cid]
+        try:
+            paste_to_sheet(header1, header2, data_rows, worksheet_name, cname)
+        except Exception as e:
+            log.error(f"❌ Sheets upload failed for {cname}: {e}")
+    else:
+        log.error(f"[ERROR] No data rows for {cname}")
 
-        result = fetch_ageing_data(cid, cname)
+# ========= PROCESS COMPANY ==========
+def process_company(cid, cname):
+    log.info(f"\n{'='*55}")
+    log.info(f"🏭 Processing: {cname} (company_id={cid})")
 
-        if result:
-            header1, header2, data_rows = transform_to_wide(result, cname)
+    result = fetch_ageing_data(cid, cname)
 
-            if data_rows:
-                # Save locally to Excel (timestamp with seconds avoids file-lock conflicts)
-                ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
-                output_file = f"{cname.lower().replace(' ', '_')}_products_{ts}.xlsx"
-                from openpyxl import Workbook
-                wb = Workbook()
-                ws = wb.active
-                ws.append(header1)
-                ws.append(header2)
-                for row in data_rows:
-                    ws.append(row)
-                wb.save(output_file)
-                log.info(f"[SAVED] {output_file}  ({len(data_rows)} rows)")
+    if result:
+        write_outputs(*transform_to_wide(result, cname), cid, cname)
+    else:
+        log.error(f"[ERROR] No data returned for {cname}")
 
-                worksheet_name = WORKSHEET_MAP[cid]
-                try:
-                    paste_to_sheet(header1, header2, data_rows, worksheet_name, cname)
-                except Exception as e:
-                    log.error(f"❌ Sheets upload failed for {cname}: {e}")
-            else:
-                log.error(f"[ERROR] No data rows for {cname}")
-        else:
-            log.error(f"[ERROR] No data returned for {cname}")
+# ========= MAIN ==========
+if __name__ == "__main__":
+    client.login()
+    client.for_each_company(COMPANIES, process_company)
@@ -0,0 +1,202 @@
+"""
+Single entry point for the scheduled refresh. Every report is laid out as steps of one
+dependency graph (login → wizard compute → fetch → transform → sinks) that runs on a
+shared Odoo session; independent steps run in parallel and steps needed by several
+reports (the same computed wizard or fetched dataset) run once.
+
+    python run_reports.py                              # default refresh
+    python run_reports.py closing upcoming             # a subset
+    python run_reports.py --list
+    python run_reports.py --dry-run                    # print the steps without running them
+"""
+import argparse
+import logging
+import sys
+from contextlib import nullcontext
+from datetime import date
+
+from dotenv import load_dotenv
+
+from dag import Dag, DAG_WORKERS
+from odoo_client import get_client
+from sheets import BATCH_WRITES, get_sheets
+
+log = logging.getLogger(__name__)
+
+LOGIN = "login"
+
+
+# ========= PLAN ==========
+class Plan:
+    """Builds the report graph; computes on one result table are chained across companies."""
+
+    def __init__(self):
+        self.dag = Dag()
+        self.client = get_client()
+        self._tails = {}    # table → its last wizard node
+        self._fetches = {}  # wizard node → every fetch node reading its rows
+        self.dag.add(LOGIN, self.client.login)
+
+    def computed_fetch(self, table, cid, params, variant, compute, fetch):
+        """
+        Node name of `fetch(wizard_id)` over a wizard computed by `compute()` for `params`.
+        Each compute rewrites the user's rows of `table` for every company, so the next
+        compute on the same table waits until every fetch of the previous one has finished
+        with them — whether it succeeded or not, so one failed report does not skip the
+        others chained behind it.
+        """
+        wizard = f"{table}:wizard:{cid}:{'/'.join(map(str, params))}"
+        data = f"{table}:{variant}:{cid}:{'/'.join(map(str, params))}"
+        if data in self.dag.nodes:
+            return data
+        if wizard not in self.dag.nodes:
+            tail = self._tails.get(table)
+            self.dag.add(wizard, lambda _: computed(compute(), wizard), [LOGIN], after=self._fetches.get(tail, []))
+            self._tails[table] = wizard
+        elif self._tails[table] != wizard:
+            # A later compute may already have rewritten the rows this fetch would read
+            raise ValueError(f"{data}: add it before the next compute on {table} ({self._tails[table]})")
+        self.dag.add(data, fetch, [wizard])
+        self._fetches.setdefault(wizard, []).append(data)
+        return data
+
+
+def computed(wizard_id, name):
+    if not wizard_id:
+        raise RuntimeError(f"{name}: wizard compute failed")
+    return wizard_id
+
+
+# ========= REPORTS ==========
+def add_closing(plan, cid, cname):
+    import Closing as report
+    data = add_ageing(plan, cid, cname, report.FROM_DATE, report.TO_DATE)
+    plan.dag.add(f"closing:sheets:{cid}", lambda df: report.write_outputs(df, cid, cname), [data])
+
+
+def add_ageing(plan, cid, cname, from_date, to_date):
+    """
+    Shared full ageing fetch (stock_ageing, the union of every output's fields) for the
+    Closing, Current Stock and 180+ outputs: one fetch per computed wizard.
+    """
+    import stock_ageing
+    return plan.computed_fetch(
+        "stock.ageing", cid, (from_date, to_date), "ageing",
+        compute=lambda: stock_ageing.prepare_ageing_wizard(plan.client, cid, from_date, to_date),
+        fetch=lambda wiz_id: stock_ageing.fetch_ageing(plan.client, cid, cname, wiz_id),
+    )
+
+
+def add_current_stock(plan, cid, cname):
+    import Current_Stock as report
+    data = add_ageing(plan, cid, cname, report.FROM_DATE, report.TO_DATE)
+    plan.dag.add(f"current_stock:sheets:{cid}", lambda df: report.write_outputs(df, cid, cname), [data])
+
+
+def add_unusable_180(plan, cid, cname):
+    import stock_ageing
+    to_date = date.today().isoformat()
+    data = add_ageing(plan, cid, cname, False, to_date)
+    plan.dag.add(
+        f"unusable_180:sheets:{cid}",
+        lambda df: stock_ageing.write_unusable_outputs(df, cid, cname, to_date),
+        [data],
+    )
+
+
+def add_opening_closing(name):
+    def add(plan, cid, cname):
+        import opening_closing as oc
+        from_date = oc.REPORTS[name]["from_date"]
+        data = plan.computed_fetch(
+            "stock.opening.closing", cid, (from_date, oc.TO_DATE), "opening_closing",
+            compute=lambda: oc.prepare_forecast_wizard(plan.client, cid, from_date, oc.TO_DATE),
+            fetch=lambda wiz_id: oc.fetch_opening_closing(plan.client, cid, cname),
+        )
+
+        def write(df):
+            if df.empty:
+                raise RuntimeError(f"{cname}: no opening/closing rows for {name}")
+            oc.write_report(df, name, cid, cname)
+
+        plan.dag.add(f"{name}:sheets:{cid}", write, [data])
+    return add
+
+
+def add_products_180(plan, cid, cname):
+    import products_180 as report
+    fetch = plan.dag.add(f"products_180:fetch:{cid}", lambda _: report.fetch_ageing_data(cid, cname), [LOGIN])
+    wide = plan.dag.add(
+        f"products_180:transform:{cid}",
+        lambda result: report.transform_to_wide(result, cname) if result else ([], [], []),
+        [fetch],
+    )
+    plan.dag.add(f"products_180:sheets:{cid}", lambda table: report.write_outputs(*table, cid, cname), [wide])
+
+
+def add_upcoming(plan, cid, cname):
+    import Upcoming as report
+    wide = plan.dag.add(f"upcoming:table:{cid}", lambda _: report.build_company_table(cid, cname), [LOGIN])
+    plan.dag.add(f"upcoming:sheets:{cid}", lambda table: report.write_outputs(*table, cid, cname), [wide])
+
+
+# name → (companies module, per-company builder)
+REPORTS = {
+    "closing": ("Closing", add_closing),
+    "current_stock": ("Current_Stock", add_current_stock),
+    "unusable_180": ("Current_Stock", add_unusable_180),
+    "rm_rejection": ("opening_closing", add_opening_closing("rm_rejection")),
+    "stock_register": ("opening_closing", add_opening_closing("stock_register")),
+    "products_180": ("products_180", add_products_180),
+    "upcoming": ("Upcoming", add_upcoming),
+}
+# What the scheduled workflow refreshes (stock_register is Mt_Zip_db.py, run on demand)
+DEFAULT_REPORTS = ["closing", "current_stock", "unusable_180", "rm_rejection", "products_180", "upcoming"]
+
+
+def build(names):
+    plan = Plan()
+    for name in names:
+        module, add = REPORTS[name]
+        companies = __import__(module).COMPANIES
+        for cid, cname in companies.items():
+            add(plan, cid, cname)
+    return plan
+
+
+# ========= MAIN ==========
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Refresh Odoo stock reports.")
+    parser.add_argument("reports", nargs="*", help=f"reports to run (default: {' '.join(DEFAULT_REPORTS)})")
+    parser.add_argument("--workers", type=int, default=DAG_WORKERS, help="steps run at once")
+    parser.add_argument("--list", action="store_true", help="list reports and exit")
+    parser.add_argument("--dry-run", action="store_true", help="print the steps and their dependencies and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in REPORTS:
+            print(f"{name}{' (default)' if name in DEFAULT_REPORTS else ''}")
+        raise SystemExit(0)
+
+    unknown = [n for n in args.reports if n not in REPORTS]
+    if unknown:
+        parser.error(f"unknown report(s): {', '.join(unknown)}")
+
+    plan = build(args.reports or DEFAULT_REPORTS)
+    if args.dry_run:
+        for name, (_, deps, after) in plan.dag.nodes.items():
+            arrows = ", ".join([*deps, *(f"{a} (after)" for a in after)])
+            print(f"{name}{'  ← ' + arrows if arrows else ''}")
+        raise SystemExit(0)
+    # Sheets writes of every report are held and sent per spreadsheet once the graph is done
+    try:
+        with get_sheets().batch() if BATCH_WRITES else nullcontext():
+            ok = plan.dag.run(workers=args.workers)
+    except Exception as e:
+        log.error(f"❌ Google Sheets batch failed: {e}")
+        ok = False
+    if not ok:
+        raise SystemExit(1)
@@ -0,0 +1,490 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from numbers import Real
+
+from odoo_client import RetryPolicy
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+SERVICE_ACCOUNT_FILE = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE", "service_account.json")
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+WRITE_MODE = os.getenv("SHEETS_WRITE_MODE", "replace")  # "diff": only changed rows; "paste": frames as text
+BATCH_WRITES = os.getenv("SHEETS_BATCH", "1") == "1"        # run_reports: send a run's writes together
+WRITES_PER_MINUTE = float(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))  # Sheets per-user write quota
+WRITE_BURST = int(os.getenv("SHEETS_WRITE_BURST", "5"))      # requests sent back to back before pacing
+CHUNK_CELLS = int(os.getenv("SHEETS_CHUNK_CELLS", "50000"))  # cells per values.batchUpdate request
+MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "6"))      # attempts per request on 429/5xx
+
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+# ========= QUOTA ==========
+def classify_sheets_error(e):
+    """Retry reason for quota (429) and server errors from the Sheets API, None otherwise."""
+    from gspread.exceptions import APIError
+
+    if isinstance(e, APIError):
+        status = e.response.status_code if e.response is not None else e.code
+        return f"http_{status}" if status in TRANSIENT_STATUS else None
+    return None
+
+
+class TokenBucket:
+    """Paces callers to `rate` requests per minute, letting `burst` of them through back to back."""
+
+    def __init__(self, rate=WRITES_PER_MINUTE, burst=WRITE_BURST):
+        self.rate = rate / 60
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SheetsWriter:
+    """
+    Background thread sending Sheets write requests one at a time, in submission order,
+    within the write quota; a 429 or 5xx is retried with exponential backoff. A job is a
+    list of (label, fn) requests: after a failed request the rest of its job is dropped.
+    """
+
+    def __init__(self, bucket=None, retry_policy=None):
+        self.bucket = bucket or TokenBucket()
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=MAX_RETRIES, backoff=2, cap=64, budget=10 * MAX_RETRIES,
+            classify=classify_sheets_error,
+        )
+        self.sent = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, requests):
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sheets-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((requests, future))
+        return future
+
+    def _send(self, fn):
+        self.bucket.acquire()
+        return fn()
+
+    def _run(self):
+        while True:
+            requests, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                results = [self.retry_policy.run(lambda: self._send(fn), label) for label, fn in requests]
+                self.sent += len(requests)
+                future.set_result(results)
+            except Exception as e:
+                future.set_exception(e)
+
+
+def _chunks(data, max_cells=CHUNK_CELLS):
+    """
+    Split [{"range", "values"}] into lists of at most `max_cells` cells: big ranges are cut
+    into row blocks anchored at their first cell, small ones share a request.
+    """
+    from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+    pieces = []
+    for d in data:
+        sheet, _, a1 = d["range"].rpartition("!")
+        row, col = a1_to_rowcol(a1.split(":")[0])
+        block, cells, start = [], 0, 0
+        for i, values in enumerate(d["values"]):
+            if block and cells + len(values) > max_cells:
+                pieces.append(({"range": f"{sheet}!{rowcol_to_a1(row + start, col)}", "values": block}, cells))
+                block, cells, start = [], 0, i
+            block.append(values)
+            cells += len(values)
+        pieces.append(({"range": f"{sheet}!{rowcol_to_a1(row + start, col)}", "values": block}, cells))
+
+    return _groups(pieces, max_cells)
+
+
+def _groups(items, max_cells=CHUNK_CELLS):
+    """Pack (item, cells) pairs in order into lists of at most `max_cells` cells."""
+    groups, size = [], 0
+    for item, cells in items:
+        if not groups or size + cells > max_cells:
+            groups.append([])
+            size = 0
+        groups[-1].append(item)
+        size += cells
+    return groups
+
+
+# ========= SHEETS CLIENT ==========
+class SheetsClient:
+    """
+    gspread client shared by every sink: authorizes once, opens each spreadsheet once and
+    keeps its worksheet-title map, so a paste costs only its own read/write requests.
+    """
+
+    def __init__(self, filename=SERVICE_ACCOUNT_FILE):
+        self.filename = filename
+        self._gc = None
+        self._spreadsheets = {}
+        self._worksheets = {}
+        self._pending = None
+        self.writer = SheetsWriter()
+        self._lock = threading.Lock()
+
+    def available(self):
+        return os.path.exists(self.filename)
+
+    def _authorize(self):
+        import gspread
+        from google.oauth2 import service_account
+
+        if self._gc is None:
+            creds = service_account.Credentials.from_service_account_file(self.filename, scopes=SCOPES)
+            self._gc = gspread.authorize(creds)
+            log.info("🔑 Google Sheets authorized")
+        return self._gc
+
+    def spreadsheet(self, key):
+        with self._lock:
+            if key not in self._spreadsheets:
+                self._spreadsheets[key] = self._authorize().open_by_key(key)
+                log.info(f"📝 Opened Google Sheet: {key}")
+            return self._spreadsheets[key]
+
+    def _titles(self, key, refresh=False):
+        sheet = self.spreadsheet(key)
+        with self._lock:
+            if refresh or key not in self._worksheets:
+                self._worksheets[key] = {ws.title: ws for ws in sheet.worksheets()}
+            return self._worksheets[key]
+
+    def worksheet(self, key, title):
+        """Worksheet `title` of spreadsheet `key`; the title map is re-read once on a miss."""
+        from gspread.exceptions import WorksheetNotFound
+
+        worksheet = self._titles(key).get(title) or self._titles(key, refresh=True).get(title)
+        if worksheet is None:
+            raise WorksheetNotFound(title)
+        return worksheet
+
+    # ----- values requests (queued while a batch is open) -----
+    @contextmanager
+    def batch(self):
+        """
+        Hold every clear and range write made inside the block and send them when it ends:
+        per spreadsheet one values.batchClear and one values.batchUpdate per input option.
+        """
+        with self._lock:
+            self._pending = {}
+        try:
+            yield self
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+            self.flush(pending)
+
+    def _queue(self, worksheet, kind, items):
+        """Add requests to the open batch; False when no batch is open."""
+        with self._lock:
+            if self._pending is None:
+                return False
+            queue = self._pending.setdefault(
+                worksheet.spreadsheet_id, {"clear": [], "RAW": [], "USER_ENTERED": [], "paste": []},
+            )
+            queue[kind].extend(items)
+            return True
+
+    def clear(self, worksheet, ranges):
+        """Clear A1 ranges of `worksheet` (None clears the whole worksheet)."""
+        from gspread.utils import absolute_range_name
+
+        ranges = [absolute_range_name(worksheet.title, r) for r in ranges]
+        if not self._queue(worksheet, "clear", ranges):
+            self._send(worksheet.spreadsheet_id, {"clear": ranges})
+
+    def update(self, worksheet, data, value_input_option="USER_ENTERED"):
+        """Write [{"range", "values"}, ...] of `worksheet`."""
+        from gspread.utils import absolute_range_name
+
+        data = [{"range": absolute_range_name(worksheet.title, d["range"]), "values": d["values"]} for d in data]
+        if not self._queue(worksheet, value_input_option, data):
+            self._send(worksheet.spreadsheet_id, {value_input_option: data})
+
+    def paste(self, worksheet, pastes):
+        """pasteData requests as [(request, cells), ...], sent in spreadsheets.batchUpdate calls."""
+        if not self._queue(worksheet, "paste", pastes):
+            self._send(worksheet.spreadsheet_id, {"paste": pastes})
+
+    def _requests(self, key, requests):
+        """(label, fn) requests for the clears and writes of one spreadsheet, big writes chunked."""
+        sheet = self.spreadsheet(key)
+        out = []
+        if requests.get("clear"):
+            clear = {"ranges": requests["clear"]}
+            out.append((f"Sheets batchClear {key}", lambda: sheet.values_batch_clear(body=clear)))
+        for option in ("RAW", "USER_ENTERED"):
+            for chunk in _chunks(requests.get(option, [])):
+                update = {"valueInputOption": option, "data": chunk}
+                out.append((f"Sheets batchUpdate {key}", lambda body=update: sheet.values_batch_update(body=body)))
+        for chunk in _groups(requests.get("paste", [])):
+            body = {"requests": chunk}
+            out.append((f"Sheets pasteData {key}", lambda body=body: sheet.batch_update(body)))
+        return out
+
+    def _send(self, key, requests):
+        return self.writer.submit(self._requests(key, requests)).result()
+
+    def run(self, label, fn):
+        """Run one other write request (e.g. a resize) through the quota-paced writer."""
+        return self.writer.submit([(label, fn)]).result()[0]
+
+    def flush(self, pending):
+        """Send queued requests of every spreadsheet through the writer; the first failure is raised."""
+        submitted, errors = [], []
+        for key, requests in pending.items():
+            try:
+                job = self._requests(key, requests)
+                submitted.append((key, requests, len(job), self.writer.submit(job)))
+            except Exception as e:
+                log.error(f"❌ {key}: batched Sheets write failed: {e}")
+                errors.append(e)
+
+        for key, requests, count, future in submitted:
+            ranges = len(requests["RAW"]) + len(requests["USER_ENTERED"])
+            try:
+                future.result()
+                log.info(
+                    f"📤 {key}: {len(requests['clear'])} clears, {ranges} ranges and "
+                    f"{len(requests['paste'])} pastes sent in {count} requests"
+                )
+            except Exception as e:
+                log.error(f"❌ {key}: batched Sheets write failed: {e}")
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+
+# ========= WRITES ==========
+def _cell(value):
+    """Cell value as set_with_dataframe sends it: blanks for nulls, numbers as-is, text otherwise."""
+    if value is None:
+        return ""
+    if isinstance(value, Real):
+        return value
+    value = str(value)
+    return f"'{value}" if value.startswith("'") else value
+
+
+def frame_rows(df):
+    """Header row plus data rows of `df` as cell values."""
+    values = df.astype(object).where(df.notna(), None).values.tolist()
+    return [list(map(str, df.columns))] + [[_cell(v) for v in row] for row in values]
+
+
+def frame_text(df):
+    """
+    `df` as tab-separated text for a pasteData request, serialised in one pass: tabs and
+    line breaks inside text become spaces, a leading apostrophe is doubled (as
+    set_with_dataframe escapes it) and nulls are left blank.
+    """
+    import csv
+    import pandas as pd
+    from pandas.api.types import is_numeric_dtype
+
+    text = {}
+    for c in df.columns:
+        col = df[c]
+        if is_numeric_dtype(col):
+            continue
+        # Only the distinct values of a categorical need checking
+        values = col.cat.categories if isinstance(col.dtype, pd.CategoricalDtype) else col.dropna()
+        if values.astype(str).str.contains(r"^'|[\t\r\n]", regex=True).any():
+            text[c] = col.astype("string").str.replace(r"[\t\r\n]", " ", regex=True).str.replace(r"^'", "''", regex=True)
+    return df.assign(**text).to_csv(
+        sep="\t", index=False, na_rep="", lineterminator="\n", quoting=csv.QUOTE_NONE,
+    )
+
+
+def paste_requests(worksheet, df, max_cells=CHUNK_CELLS):
+    """pasteData requests writing `df` (header in row 1) in row blocks of at most `max_cells` cells."""
+    lines = frame_text(df).split("\n")[:-1]
+    step = max(1, max_cells // max(1, len(df.columns)))
+    return [
+        ({
+            "pasteData": {
+                "coordinate": {"sheetId": worksheet.id, "rowIndex": start, "columnIndex": 0},
+                "data": "\n".join(lines[start:start + step]),
+                "type": "PASTE_NORMAL",
+                "delimiter": "\t",
+            }
+        }, len(lines[start:start + step]) * len(df.columns))
+        for start in range(0, len(lines), step)
+    ]
+
+
+def _same(old, new):
+    """True when a cell read back unformatted already holds `new` (numbers compare as numbers)."""
+    if old == new:
+        return True
+    try:
+        return float(old) == float(new)
+    except (TypeError, ValueError):
+        return str(old) == str(new)
+
+
+def _fit(worksheet, rows, cols, exact=False):
+    """Grow the grid to hold rows × cols, or with `exact` resize it to that size."""
+    if not exact:
+        if rows <= worksheet.row_count and cols <= worksheet.col_count:
+            return
+        rows, cols = max(rows, worksheet.row_count), max(cols, worksheet.col_count)
+    if (rows, cols) != (worksheet.row_count, worksheet.col_count):
+        get_sheets().run(f"Sheets resize {worksheet.title}", lambda: worksheet.resize(rows, cols))
+
+
+def _runs(changed):
+    """Consecutive indexes of `changed` grouped as (first, last) pairs."""
+    runs = []
+    for i in changed:
+        if runs and runs[-1][1] == i - 1:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+    return runs
+
+
+def diff_update(worksheet, rows, first_row=1, last_col=None, raw_rows=0):
+    """
+    Write `rows` at A{first_row}, sending only the row ranges whose values changed.
+
+    With `last_col`, columns A:last_col from `first_row` down belong to this sink: rows are
+    padded to that width and rows left over from a longer previous paste are cleared, as a
+    clear-and-rewrite would. Without it only the cells of `rows` are compared and written.
+    The first `raw_rows` rows (headers) are written RAW, the rest USER_ENTERED.
+    """
+    from gspread.utils import column_letter_to_index, rowcol_to_a1
+
+    if last_col:
+        width = column_letter_to_index(last_col)
+        read_range = f"A{first_row}:{last_col}"
+    else:
+        width = max(map(len, rows), default=0)
+        read_range = f"A{first_row}:{rowcol_to_a1(first_row + len(rows) - 1, max(width, 1))}"
+    rows = [list(row) + [""] * (width - len(row)) for row in rows]
+
+    old = worksheet.get_values(
+        read_range, value_render_option="UNFORMATTED_VALUE", date_time_render_option="FORMATTED_STRING",
+    )
+    old = [list(row) + [""] * (width - len(row)) for row in old]
+
+    changed = [
+        i for i, row in enumerate(rows)
+        if i >= len(old) or not all(_same(o, n) for o, n in zip(old[i], row))
+    ]
+    writes = {"RAW": [], "USER_ENTERED": []}
+    for first, last in _runs(changed):
+        # A run crossing the header/data boundary is split so each part keeps its input option
+        for lo, hi in ((first, min(last, raw_rows - 1)), (max(first, raw_rows), last)):
+            if lo <= hi:
+                writes["RAW" if lo < raw_rows else "USER_ENTERED"].append({
+                    "range": f"{rowcol_to_a1(first_row + lo, 1)}:{rowcol_to_a1(first_row + hi, width)}",
+                    "values": rows[lo:hi + 1],
+                })
+
+    sheets = get_sheets()
+    _fit(worksheet, first_row + len(rows) - 1, width)
+    for option, data in writes.items():
+        if data:
+            sheets.update(worksheet, data, option)
+
+    stale = [i for i in range(len(rows), len(old)) if any(v != "" for v in old[i])] if last_col else []
+    if stale:
+        sheets.clear(worksheet, [f"A{first_row + stale[0]}:{last_col}{first_row + stale[-1]}"])
+
+    log.info(
+        f"🔁 {worksheet.title}: {len(changed)}/{len(rows)} rows changed, "
+        f"{sum(map(len, writes.values()))} ranges written, {len(stale)} stale rows cleared"
+    )
+
+
+def paste_frame(worksheet, df, clear_range=None, resize=False):
+    """
+    Replace the sheet's data with `df` (header in row 1): clear `clear_range` (the whole sheet
+    when None) and rewrite it, as cell values or, in paste mode, as pasted text; in diff mode
+    update only the rows that changed. `resize` shrinks the grid to the frame, as
+    set_with_dataframe(resize=True) does.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    sheets = get_sheets()
+    width = len(df.columns)
+    _fit(worksheet, len(df) + 1, width, exact=resize)
+
+    if WRITE_MODE == "diff":
+        last_col = clear_range.split(":")[1] if clear_range else rowcol_to_a1(1, worksheet.col_count)[:-1]
+        diff_update(worksheet, frame_rows(df), last_col=last_col)
+        return
+
+    sheets.clear(worksheet, [clear_range])
+    if WRITE_MODE == "paste":
+        sheets.paste(worksheet, paste_requests(worksheet, df))
+    else:
+        rows = frame_rows(df)
+        sheets.update(worksheet, [{"range": f"A1:{rowcol_to_a1(len(rows), width)}", "values": rows}])
+
+
+def paste_rows(worksheet, header_rows, data_rows, first_row=1):
+    """
+    Header rows (RAW) followed by data rows (USER_ENTERED) from A{first_row}; nothing is
+    cleared. These tables are small, so paste mode writes them as cell values too.
+    """
+    if WRITE_MODE == "diff":
+        diff_update(worksheet, header_rows + data_rows, first_row=first_row, raw_rows=len(header_rows))
+        return
+
+    sheets = get_sheets()
+    _fit(worksheet, first_row + len(header_rows) + len(data_rows) - 1, max(map(len, header_rows + data_rows)))
+    sheets.update(worksheet, [{"range": f"A{first_row}", "values": header_rows}], "RAW")
+    if data_rows:
+        sheets.update(worksheet, [{"range": f"A{first_row + len(header_rows)}", "values": data_rows}])
+
+
+_sheets = None
+_sheets_lock = threading.Lock()
+
+
+def get_sheets():
+    """Process-wide shared Sheets client, so every report reuses one authorization."""
+    global _sheets
+    with _sheets_lock:
+        if _sheets is None:
+            # gspread's package imports are circular: import it once here rather than
+            # from several sink threads at the same time
+            import gspread  # noqa: F401
+            _sheets = SheetsClient()
+        return _sheets
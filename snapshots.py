@@ -0,0 +1,169 @@
+"""
+Local history of every report output: each run appends its frames under
+
+    history/report=<report>/company=<company>/as_of=<YYYY-MM-DD>/run-<timestamp>.parquet
+
+(csv.gz when pyarrow is not installed), indexed by history/manifest.json so a trend query
+reads only the files it needs, e.g. 180+ value by category over the last 90 days:
+
+    df = scan("current_stock", since=(date.today() - timedelta(days=90)).isoformat())
+    df.groupby(["as_of", "Category"])[["181-365", "365+"]].sum()
+
+    python snapshots.py                          # snapshots per report and company
+    python snapshots.py closing --since 2026-01-01
+
+history/ is not committed. The workflows carry it from run to run in the GitHub Actions cache
+(restored from the newest "report-history-" entry, saved under a new key after every run, even
+a failed one). When two runs overlap, the snapshots of the one saved first are lost. Caches
+unused for 7 days are evicted, so point HISTORY_DIR at durable storage to keep history longer.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+
+from outputs import HAS_ARROW, WRITERS
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")
+SNAPSHOTS = os.getenv("SNAPSHOTS", "1") == "1"   # "0" stops appending report outputs to the history
+MANIFEST = "manifest.json"
+
+RUN_AT = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")  # shared by every snapshot of this run
+
+_lock = threading.Lock()
+
+
+# ========= MANIFEST ==========
+def load_manifest(root=HISTORY_DIR):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(entries, root):
+    path = os.path.join(root, MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+    os.replace(tmp, path)
+
+
+def company_slug(cname):
+    return cname.lower().replace(" ", "_")
+
+
+# ========= WRITE ==========
+def table_frame(header1, header2, data_rows):
+    """Wide Upcoming / products table as a frame, its two header rows joined into column names."""
+    import pandas as pd
+
+    columns = [f"{h1} {h2}".strip() for h1, h2 in zip(header1, header2)]
+    return pd.DataFrame(data_rows, columns=columns)
+
+
+def append_snapshot(df, report, cname, as_of=None, root=HISTORY_DIR):
+    """
+    Store `df` as this run's snapshot of `report` for company `cname` on `as_of` (default today)
+    and index it in the manifest. History is secondary to the report itself: a failure is
+    logged, never raised.
+    """
+    if not SNAPSHOTS or df is None or df.empty:
+        return None
+    as_of = as_of or date.today().isoformat()
+    company = company_slug(cname)
+    fmt = "parquet" if HAS_ARROW else "csv.gz"
+    partition = os.path.join(f"report={report}", f"company={company}", f"as_of={as_of}")
+    relpath = os.path.join(partition, f"run-{RUN_AT.replace(':', '')}.{fmt}")
+
+    try:
+        os.makedirs(os.path.join(root, partition), exist_ok=True)
+        path = os.path.join(root, relpath)
+        WRITERS[fmt](df, path)
+
+        entry = {
+            "report": report, "company": company, "as_of": as_of, "run_at": RUN_AT,
+            "path": relpath, "format": fmt, "rows": len(df), "columns": [str(c) for c in df.columns],
+        }
+        with _lock:
+            entries = [e for e in load_manifest(root) if e["path"] != relpath]
+            entries.append(entry)
+            _save_manifest(entries, root)
+        log.info(f"🗄️ {report}/{company}: {len(df)} rows snapshotted for {as_of}")
+        return path
+    except Exception as e:
+        log.error(f"❌ {report}/{company}: snapshot for {as_of} failed: {e}")
+        return None
+
+
+# ========= QUERY ==========
+def find(report=None, company=None, since=None, until=None, latest=True, root=HISTORY_DIR):
+    """
+    Manifest entries matching the filters (ISO dates, inclusive), oldest first; with `latest`
+    only the last run of each company and day.
+    """
+    company = company_slug(company) if company else None
+    entries = [
+        e for e in load_manifest(root)
+        if (report is None or e["report"] == report)
+        and (company is None or e["company"] == company)
+        and (since is None or e["as_of"] >= since)
+        and (until is None or e["as_of"] <= until)
+    ]
+    if latest:
+        last = {}
+        for e in entries:
+            key = (e["report"], e["company"], e["as_of"])
+            if key not in last or e["run_at"] > last[key]["run_at"]:
+                last[key] = e
+        entries = list(last.values())
+    return sorted(entries, key=lambda e: (e["as_of"], e["run_at"], e["report"], e["company"]))
+
+
+def scan(report, company=None, since=None, until=None, columns=None, latest=True, root=HISTORY_DIR):
+    """
+    Snapshots of `report` as one frame with `company`, `as_of` and `run_at` columns added;
+    only the files the manifest selects are read, and only `columns` of them when given.
+    """
+    import pandas as pd
+
+    frames = []
+    for e in find(report, company, since, until, latest, root):
+        path = os.path.join(root, e["path"])
+        if e["format"] == "parquet":
+            df = pd.read_parquet(path, columns=columns)
+        else:
+            df = pd.read_csv(path, usecols=columns)
+        frames.append(df.assign(company=e["company"], as_of=e["as_of"], run_at=e["run_at"]))
+    if not frames:
+        return pd.DataFrame(columns=list(columns or []) + ["company", "as_of", "run_at"])
+    return pd.concat(frames, ignore_index=True)
+
+
+# ========= MAIN ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List report snapshots in the local history.")
+    parser.add_argument("report", nargs="?", help="only this report, one line per snapshot")
+    parser.add_argument("--company")
+    parser.add_argument("--since", help="first as-of date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last as-of date (YYYY-MM-DD)")
+    parser.add_argument("--all-runs", action="store_true", help="every run, not just the last one per day")
+    args = parser.parse_args()
+
+    entries = find(args.report, args.company, args.since, args.until, latest=not args.all_runs)
+    if args.report:
+        for e in entries:
+            print(f"{e['as_of']}  {e['run_at']}  {e['company']:<12} {e['rows']:>8} rows  {e['path']}")
+    else:
+        summary = {}
+        for e in entries:
+            days = summary.setdefault((e["report"], e["company"]), set())
+            days.add(e["as_of"])
+        for (report, company), days in sorted(summary.items()):
+            print(f"{report:<16} {company:<12} {len(days):>4} days  {min(days)} → {max(days)}")
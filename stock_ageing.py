@@ -0,0 +1,193 @@
+import logging
+import os
+from datetime import datetime
+
+from odoo_client import FETCH_WORKERS, OdooRPCError
+from ingest import fetch_frame, export_view, AGEING_SCHEMA
+from sheets import get_sheets, paste_frame
+from outputs import save_frame
+from snapshots import append_snapshot
+
+log = logging.getLogger(__name__)
+
+# ========= CONFIG ==========
+SHEET_KEY = "1j37Y6g3pnMWtwe2fjTe1JTT32aRLS0Z1YPjl3v657Cc"
+DOWNLOAD_DIR = os.path.join(os.getcwd(), "download")
+
+UNUSABLE_WORKSHEETS = {
+    1: "unusable_zip",
+    3: "unusable_MT",
+}
+
+# ========= LABEL MAPPING ==========
+# Union of the fields every ageing output needs: the Current Stock columns plus lot_id.unusable
+LABELS = {
+    "parent_category": "Product",
+    "product_category": "Category",
+    "product_id": "Item",
+    "lot_id": "Invoice",
+    "lot_id.unusable": "Unusable",
+    "receive_date": "Receive Date",
+    "shipment_mode": "Shipment Mode",
+    "slot_1": "0-30",
+    "slot_2": "31-60",
+    "slot_3": "61-90",
+    "slot_4": "91-180",
+    "slot_5": "181-365",
+    "slot_6": "365+",
+    "duration": "Duration",
+    "cloing_qty": "Quantity",
+    "cloing_value": "Value",
+    "landed_cost": "Landed Cost",
+    "lot_price": "Price",
+    "pur_price": "Pur Price",
+    "rejected": "Rejected",
+    "company_id": "Company",
+}
+
+SPECIFICATION = {
+    k: ({"fields": {"display_name": {}}} if k.endswith("_id") or k.endswith("_category") else {})
+    for k in LABELS if "." not in k
+}
+SPECIFICATION["lot_id"] = {"fields": {"display_name": {}, "unusable": {}}}
+
+DOMAIN = [["product_id.categ_id.complete_name", "ilike", "All / RM"]]
+AGED_DOMAIN = DOMAIN + ["|", ["slot_5", ">", 0], ["slot_6", ">", 0]]
+
+UNUSABLE_COLUMNS = ["181-365", "365+", "Invoice", "Unusable"]
+
+
+# ========= CREATE AGEING WIZARD ==========
+def create_ageing_wizard(client, company_id, from_date, to_date):
+    result = client.call_kw(
+        "stock.forecast.report", "web_save",
+        args=[[], {
+            "report_type": "ageing",
+            "report_for": "rm",
+            "all_iteam_list": [],
+            "from_date": from_date,
+            "to_date": to_date
+        }],
+        kwargs={
+            "context": client.context(company_id),
+            "specification": {
+                "report_type": {},
+                "report_for": {},
+                "all_iteam_list": {"fields": {"display_name": {}}},
+                "from_date": {},
+                "to_date": {},
+            },
+        },
+    )
+    if isinstance(result, list) and result:
+        wiz_id = result[0]["id"]
+        log.info(f"🪄 Ageing wizard {wiz_id} created for company {company_id}")
+        return wiz_id
+    else:
+        raise Exception(f"❌ Failed to create ageing wizard: {result}")
+
+
+# ========= COMPUTE AGEING ==========
+def compute_ageing(client, company_id, wizard_id):
+    try:
+        client.call_button(
+            "stock.forecast.report", "print_date_wise_stock_register",
+            args=[[wizard_id]],
+            kwargs={"context": client.context(company_id)},
+        )
+    except OdooRPCError as e:
+        log.error(f"❌ Error computing ageing for {company_id}: {e.error}")
+        return False
+    log.info(f"⚡ Ageing computed for wizard {wizard_id} (company {company_id})")
+    return True
+
+
+# ========= COMPUTED AGEING WIZARD ==========
+def prepare_ageing_wizard(client, company_id, from_date, to_date):
+    """Ageing wizard computed for the company, reused when another report already computed the same one."""
+    def build():
+        wiz_id = create_ageing_wizard(client, company_id, from_date, to_date)
+        return wiz_id if compute_ageing(client, company_id, wiz_id) else None
+
+    return client.cached_wizard(
+        "stock.forecast.report", company_id,
+        {"report_type": "ageing", "report_for": "rm", "from_date": from_date, "to_date": to_date},
+        "stock.ageing", build,
+    )
+
+
+# ========= FETCH AGEING REPORT ==========
+def fetch_ageing(client, company_id, cname, wizard_id, domain=DOMAIN, workers=FETCH_WORKERS):
+    """RM ageing rows of a computed wizard, with the columns of every derived output."""
+    context = {"allowed_company_ids": [company_id], "company_id": company_id,
+               "active_model": "stock.forecast.report", "active_id": wizard_id, "active_ids": [wizard_id]}
+    df = fetch_frame(
+        client, "stock.ageing", SPECIFICATION,
+        domain=domain, context=context, labels=LABELS,
+        schema=AGEING_SCHEMA, workers=workers,
+    )
+    log.info(f"📊 {cname}: {len(df)} ageing rows fetched")
+    return df
+
+
+# ========= DERIVED VIEWS ==========
+def current_stock_view(df):
+    """Current Stock sheet columns (A:T)."""
+    return df.drop(columns=["id", "Unusable"], errors="ignore")
+
+
+def unusable_view(df):
+    """Lots aged beyond 180 days (181-365 or 365+ > 0) with their unusable flag."""
+    if df.empty:
+        return df.reindex(columns=UNUSABLE_COLUMNS)
+    aged = df[(df["181-365"] > 0) | (df["365+"] > 0)]
+    return aged[UNUSABLE_COLUMNS].reset_index(drop=True)
+
+
+# ========= 180+ USABLE / UNUSABLE OUTPUTS ==========
+def paste_unusable_sheet(df, worksheet_name, sheet_key=SHEET_KEY):
+    sheets = get_sheets()
+    if not sheets.available():
+        log.warning(f"⚠️ {sheets.filename} not found. Skipping Google Sheet update.")
+        return
+
+    import pytz
+
+    try:
+        worksheet = sheets.worksheet(sheet_key, worksheet_name)
+
+        if df.empty:
+            log.info(f"🗑️ Clearing existing data in {worksheet_name}...")
+            sheets.clear(worksheet, [None])
+            log.warning(f"⚠️ No data to paste for {worksheet_name}. Sheet has been cleared.")
+        else:
+            log.info(f"📋 Pasting {len(df)} rows to {worksheet_name}...")
+            paste_frame(worksheet, export_view(df), resize=True)
+
+            tz = pytz.timezone("Asia/Dhaka")
+            timestamp = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
+
+            log.info(f"✅ Successfully pasted data to {worksheet_name}")
+            log.info(f"📊 Data shape: {df.shape[0]} rows × {df.shape[1]} columns")
+            log.info(f"🕐 Timestamp: {timestamp}")
+
+    except Exception as e:
+        log.error(f"❌ Failed to paste data to Google Sheet '{worksheet_name}': {e}")
+        raise
+
+
+def write_unusable_outputs(df, cid, cname, to_date):
+    """Excel file and sheet of the 180+ usable/unusable lots, from an ageing frame."""
+    df = unusable_view(df)
+    log.info(f"📊 {cname}: {len(df)} rows with slot_5 or slot_6 > 0")
+
+    if not df.empty:
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        local_file = os.path.join(DOWNLOAD_DIR, f"{cname.lower().replace(' ', '')}_ageing_{to_date}.xlsx")
+        for path in save_frame(df, local_file):
+            log.info(f"📂 Saved locally: {path}")
+        append_snapshot(df, "unusable_180", cname, to_date)
+    else:
+        log.warning(f"⚠️ No data available for {cname}")
+
+    paste_unusable_sheet(df, UNUSABLE_WORKSHEETS[cid])
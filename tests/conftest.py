@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The report modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ODOO_SESSION_CACHE", "")
+os.environ.setdefault("ODOO_WIZARD_CACHE", "")
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from dag import Dag
+
+
+def fail(*_):
+    raise RuntimeError("boom")
+
+
+def test_results_flow_to_dependents():
+    dag = Dag()
+    dag.add("a", lambda: 2)
+    dag.add("b", lambda: 3)
+    dag.add("sum", lambda a, b: a + b, ["a", "b"])
+    assert dag.run()
+    assert dag.results["sum"] == 5
+
+
+def test_failure_skips_dependents_only():
+    dag = Dag()
+    dag.add("login", lambda: "uid")
+    dag.add("fetch", fail, ["login"])
+    dag.add("transform", lambda df: df, ["fetch"])
+    dag.add("sheets", lambda df: df, ["transform"])
+    dag.add("other", lambda uid: uid, ["login"])
+    assert not dag.run()
+    assert set(dag.failed) == {"fetch"}
+    assert dag.skipped == ["transform", "sheets"]
+    assert dag.results["other"] == "uid"
+
+
+def test_after_waits_for_any_outcome_without_passing_results():
+    order = []
+    lock = threading.Lock()
+
+    def step(name, result=None, error=False):
+        def run(*args):
+            with lock:
+                order.append((name, args))
+            if error:
+                raise RuntimeError(name)
+            return result
+        return run
+
+    dag = Dag()
+    dag.add("login", step("login", "uid"))
+    dag.add("compute1", step("compute1", 1, error=True), ["login"])
+    dag.add("fetch1", step("fetch1"), ["compute1"])
+    dag.add("fetch1b", step("fetch1b", "df"), ["login"])
+    dag.add("compute2", step("compute2", 2), ["login"], after=["fetch1", "fetch1b"])
+    dag.add("fetch2", step("fetch2", "df2"), ["compute2"])
+    dag.run(workers=4)
+
+    names = [name for name, _ in order]
+    # fetch1 was skipped, fetch1b succeeded: compute2 still runs, after both have finished
+    assert dag.skipped == ["fetch1"]
+    assert names.index("compute2") > names.index("fetch1b")
+    assert dict(order)["compute2"] == ("uid",)
+    assert dag.results["fetch2"] == "df2"
+
+
+def test_unknown_dependency_is_rejected():
+    dag = Dag()
+    with pytest.raises(KeyError):
+        dag.add("b", lambda a: a, ["a"])
+    with pytest.raises(KeyError):
+        dag.add("c", lambda: None, after=["a"])
+
+
+def test_same_name_is_one_shared_step():
+    calls = []
+    dag = Dag()
+    dag.add("a", lambda: calls.append(1))
+    dag.add("a", lambda: calls.append(2))
+    dag.run()
+    assert calls == [1]
@@ -0,0 +1,55 @@
+from ingest import AGEING_SCHEMA, apply_schema, decode_columns, export_view
+
+SPECIFICATION = {
+    "product_id": {"fields": {"display_name": {}}},
+    "lot_id": {"fields": {"display_name": {}, "unusable": {}}},
+    "shipment_mode": {},
+    "cloing_qty": {},
+}
+LABELS = {"product_id": "Item", "lot_id": "Invoice", "lot_id.unusable": "Unusable",
+          "shipment_mode": "Shipment Mode", "cloing_qty": "Quantity"}
+RECORDS = [
+    {"id": 1, "product_id": {"id": 10, "display_name": "[RM1] Tape"},
+     "lot_id": {"id": 7, "display_name": "INV/1", "unusable": True}, "shipment_mode": "sea", "cloing_qty": 5.0},
+    # Odoo sends False for an empty relation and an empty selection
+    {"id": 2, "product_id": {"id": 11, "display_name": "[RM2] Slider"},
+     "lot_id": False, "shipment_mode": False, "cloing_qty": 0.0},
+]
+
+
+def test_relations_decode_to_display_names():
+    columns = decode_columns(RECORDS, SPECIFICATION, LABELS)
+    assert columns == {
+        "id": [1, 2],
+        "Item": ["[RM1] Tape", "[RM2] Slider"],
+        "Invoice": ["INV/1", None],
+        "Unusable": [True, None],
+        "Shipment Mode": ["sea", False],
+        "Quantity": [5.0, 0.0],
+    }
+
+
+def test_relation_ids_and_unlabelled_subfields():
+    columns = decode_columns(RECORDS, SPECIFICATION, with_ids=True)
+    assert columns["lot_id ID"] == [7, None]
+    assert columns["product_id ID"] == [10, 11]
+    assert columns["lot_id.unusable"] == [True, None]
+
+
+def test_no_records():
+    assert decode_columns([], SPECIFICATION, LABELS) == {
+        "Item": [], "Invoice": [], "Unusable": [], "Shipment Mode": [], "Quantity": [],
+    }
+
+
+def test_missing_values_export_as_false():
+    import pandas as pd
+
+    df = apply_schema(pd.DataFrame(decode_columns(RECORDS, SPECIFICATION, LABELS)), AGEING_SCHEMA)
+    assert df["Invoice"].isna().tolist() == [False, True]
+    assert df["Shipment Mode"].isna().tolist() == [False, True]
+
+    view = export_view(df)
+    assert view["Invoice"].tolist() == ["INV/1", False]
+    assert view["Shipment Mode"].tolist() == ["sea", False]
+    assert view["Unusable"].tolist() == [True, False]
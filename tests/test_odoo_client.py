@@ -0,0 +1,70 @@
+import pytest
+import requests
+from requests.exceptions import ConnectionError, ConnectTimeout, HTTPError, ReadTimeout
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from odoo_client import OdooRPCError, RetryPolicy, classify_error, classify_unsafe_error
+
+
+def odoo_error(name, message=""):
+    return OdooRPCError({"message": "Odoo Server Error", "data": {"name": name, "message": message}})
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return HTTPError(f"{status} error", response=response)
+
+
+def refused():
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    return ConnectionError(MaxRetryError(None, "/web/dataset/call_button", reason=reason))
+
+
+@pytest.mark.parametrize("error, reason", [
+    (odoo_error("psycopg2.errors.SerializationFailure", "could not serialize access"), "serialization"),
+    (odoo_error("odoo.exceptions.ValidationError", "bad value"), None),
+    (http_error(502), "http_502"),
+    (http_error(404), None),
+    (ReadTimeout(), "timeout"),
+    (ConnectTimeout(), "timeout"),
+    (ConnectionError(), "connection"),
+    (ValueError("bad JSON"), "bad_response"),
+    (KeyError("x"), None),
+])
+def test_classify_error(error, reason):
+    assert classify_error(error) == reason
+
+
+@pytest.mark.parametrize("error, reason", [
+    (odoo_error("odoo.exceptions.DeadlockDetected", "deadlock detected"), "deadlock"),
+    (odoo_error("odoo.exceptions.ValidationError", "bad value"), None),
+    (ConnectTimeout(), "connect_timeout"),
+    (refused(), "connection_refused"),
+    # The request may have reached Odoo: never replayed
+    (ReadTimeout(), None),
+    (http_error(502), None),
+    (http_error(504), None),
+    (ConnectionError("Connection aborted."), None),
+    (ValueError("bad JSON"), None),
+])
+def test_classify_unsafe_error(error, reason):
+    assert classify_unsafe_error(error) == reason
+
+
+def test_retry_policy_uses_the_call_classifier():
+    calls = []
+
+    def gateway_timeout():
+        calls.append(1)
+        raise http_error(504)
+
+    policy = RetryPolicy(max_retries=3, backoff=0, budget=10)
+    with pytest.raises(HTTPError):
+        policy.run(gateway_timeout)
+    assert len(calls) == 3
+
+    calls.clear()
+    with pytest.raises(HTTPError):
+        policy.run(gateway_timeout, classify=classify_unsafe_error)
+    assert len(calls) == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from run_reports import Plan
+
+
+def fetch(table, cid, variant, params=("2026-09-30",)):
+    return dict(table=table, cid=cid, params=params, variant=variant, compute=lambda: 1, fetch=lambda w: w)
+
+
+def test_next_compute_waits_for_every_fetch_of_the_previous_one():
+    plan = Plan()
+    plan.computed_fetch(**fetch("stock.ageing", 1, "ageing"))
+    plan.computed_fetch(**fetch("stock.ageing", 1, "wide"))
+    plan.computed_fetch(**fetch("stock.ageing", 3, "ageing"))
+    plan.computed_fetch(**fetch("stock.opening.closing", 3, "opening_closing"))
+
+    _, deps, after = plan.dag.nodes["stock.ageing:wizard:3:2026-09-30"]
+    assert deps == ("login",)
+    assert after == ("stock.ageing:ageing:1:2026-09-30", "stock.ageing:wide:1:2026-09-30")
+    # Other tables are not chained to it
+    assert plan.dag.nodes["stock.opening.closing:wizard:3:2026-09-30"][2] == ()
+
+
+def test_shared_fetch_is_registered_once():
+    plan = Plan()
+    first = plan.computed_fetch(**fetch("stock.ageing", 1, "ageing"))
+    assert plan.computed_fetch(**fetch("stock.ageing", 1, "ageing")) == first
+    assert len(plan.dag.nodes) == 3  # login, wizard, fetch
+
+
+def test_fetch_after_a_later_compute_is_rejected():
+    plan = Plan()
+    plan.computed_fetch(**fetch("stock.ageing", 1, "ageing"))
+    plan.computed_fetch(**fetch("stock.ageing", 3, "ageing"))
+    with pytest.raises(ValueError):
+        plan.computed_fetch(**fetch("stock.ageing", 1, "wide"))
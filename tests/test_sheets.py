@@ -0,0 +1,113 @@
+import pytest
+
+import sheets
+
+
+class FakeWorksheet:
+    """Worksheet holding `values` (as read back UNFORMATTED) on a rows × cols grid."""
+
+    title = "S"
+
+    def __init__(self, values, rows=100, cols=26):
+        self.values = values
+        self.row_count, self.col_count = rows, cols
+        self.read = None
+
+    def get_values(self, range_name, **kwargs):
+        self.read = range_name
+        return self.values
+
+    def resize(self, rows=None, cols=None):
+        self.row_count, self.col_count = rows, cols
+
+
+class RecordingSheets:
+    def __init__(self):
+        self.updates, self.clears = [], []
+
+    def update(self, worksheet, data, value_input_option="USER_ENTERED"):
+        self.updates.append((value_input_option, data))
+
+    def clear(self, worksheet, ranges):
+        self.clears.extend(ranges)
+
+    def run(self, label, fn):
+        return fn()
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    recording = RecordingSheets()
+    monkeypatch.setattr(sheets, "get_sheets", lambda: recording)
+    return recording
+
+
+def test_diff_update_writes_only_changed_rows(recorded):
+    ws = FakeWorksheet([["a", 1, "x"], ["b", 2, "y"], ["c", 3, "z"], ["d", 4, "w"]])
+    rows = [["a", "1", "x"], ["b", 20, "y"], ["c", 30, "z"], ["d", 4.0, "w"]]
+    sheets.diff_update(ws, rows, last_col="C")
+    # Numbers compare as numbers: only rows 2-3 changed, sent as one range
+    assert recorded.updates == [("USER_ENTERED", [{"range": "A2:C3", "values": [["b", 20, "y"], ["c", 30, "z"]]}])]
+    assert recorded.clears == []
+
+
+def test_diff_update_clears_stale_rows(recorded):
+    ws = FakeWorksheet([["h1", "h2"], ["a", 1], ["b", 2], ["", ""], ["c", 3], ["d", 4]])
+    sheets.diff_update(ws, [["h1", "h2"], ["a", 1]], last_col="B")
+    assert recorded.updates == []
+    # Rows 3-6 are left over from the longer previous paste
+    assert recorded.clears == ["A3:B6"]
+    assert ws.read == "A1:B"
+
+
+def test_diff_update_only_clears_own_columns_below_first_row(recorded):
+    ws = FakeWorksheet([["a"], ["b"], ["c"]])
+    sheets.diff_update(ws, [["a"]], first_row=3, last_col="D")
+    assert recorded.clears == ["A4:D5"]
+
+
+def test_diff_update_without_last_col_never_clears(recorded):
+    ws = FakeWorksheet([["a"], ["b"], ["c"]])
+    sheets.diff_update(ws, [["a"]])
+    assert recorded.clears == []
+    assert ws.read == "A1:A1"
+
+
+def test_diff_update_keeps_headers_raw(recorded):
+    ws = FakeWorksheet([["old header"], ["1"]])
+    sheets.diff_update(ws, [["Header"], ["=1+1"], ["new"]], raw_rows=1, last_col="A")
+    assert recorded.updates == [
+        ("RAW", [{"range": "A1:A1", "values": [["Header"]]}]),
+        ("USER_ENTERED", [{"range": "A2:A3", "values": [["=1+1"], ["new"]]}]),
+    ]
+
+
+def cells(group):
+    return sum(len(row) for d in group for row in d["values"])
+
+
+def test_chunks_cut_big_ranges_into_anchored_row_blocks():
+    data = [{"range": "'S'!B3:D10", "values": [[i, i, i] for i in range(8)]}]
+    groups = sheets._chunks(data, max_cells=7)
+    assert [[d["range"] for d in g] for g in groups] == [["'S'!B3"], ["'S'!B5"], ["'S'!B7"], ["'S'!B9"]]
+    assert [g[0]["values"][0][0] for g in groups] == [0, 2, 4, 6]
+    assert all(cells(g) <= 7 for g in groups)
+
+
+def test_chunks_boundary_is_inclusive():
+    data = [{"range": "'S'!A1", "values": [[1, 2, 3]] * 4}]
+    assert [cells(g) for g in sheets._chunks(data, max_cells=6)] == [6, 6]
+    assert [cells(g) for g in sheets._chunks(data, max_cells=12)] == [12]
+
+
+def test_chunks_pack_small_ranges_in_order():
+    data = [{"range": f"'S'!A{i}", "values": [[i, i]]} for i in range(1, 6)]
+    groups = sheets._chunks(data, max_cells=4)
+    assert [[d["range"] for d in g] for g in groups] == [["'S'!A1", "'S'!A2"], ["'S'!A3", "'S'!A4"], ["'S'!A5"]]
+
+
+def test_chunks_keep_a_row_wider_than_the_limit_whole():
+    data = [{"range": "'S'!A1", "values": [[0] * 10, [1]]}]
+    groups = sheets._chunks(data, max_cells=4)
+    assert [[d["values"] for d in g] for g in groups] == [[[[0] * 10]], [[[1]]]]
+    assert groups[1][0]["range"] == "'S'!A2"